@@ -15,18 +15,25 @@ Long description of module's purpose
     # Check https://github.com/odoo/odoo/blob/15.0/odoo/addons/base/data/ir_module_category_data.xml
     # for the full list
     'category': 'Uncategorized',
-    'version': '0.1',
+    'version': '0.7',
 
     # any module necessary for this one to work correctly
     'depends': ['base'],
 
+    # python libraries needed by the module
+    'external_dependencies': {
+        'python': ['numpy'],
+    },
+
     # always loaded
     'data': [
         'security/ir.model.access.csv',
+        'data/cron.xml',
         'views/courses.xml',
         'views/exams.xml',
         'views/menus.xml',
         'views/questions.xml',
+        'views/reports.xml',
     ],
     # only loaded in demonstration mode
     'demo': [
@@ -0,0 +1,187 @@
+"""
+Benchmark of the easy_exams indexes on a seeded dataset of about a million answers.
+
+Run it in an Odoo shell on a scratch database where the module is installed:
+
+    odoo-bin shell -d <database> --no-http < benchmarks/bench_indexes.py
+
+The dataset is inserted with plain SQL and everything (data and dropped indexes) is
+rolled back at the end, nothing is left in the database. The "without indexes" run
+drops the plain indexes only, the ones backing unique constraints (such as
+question_answer (attempt_id, question_id)) are kept. Dropping the indexes takes
+exclusive locks on the tables, do not run it against a database in use.
+"""
+import statistics
+import time
+
+EXAMS = 50
+QUESTIONS_PER_EXAM = 20
+MATCHING_QUESTIONS = 4
+ATTEMPTS_PER_EXAM = 1000
+REPEAT = 20
+
+TABLES = [
+    'easy_exams_exam',
+    'easy_exams_question',
+    'easy_exams_question_option',
+    'easy_exams_question_pair',
+    'easy_exams_exam_attempt',
+    'easy_exams_question_answer',
+    'easy_exams_answer_option',
+    'easy_exams_question_answer_pair',
+]
+
+
+def seed(cr):
+    cr.execute("""
+        INSERT INTO easy_exams_course (name, code, access_key)
+        VALUES ('Index benchmark', 'BENCH-IDX', 'BENCH') RETURNING id
+    """)
+    course_id = cr.fetchone()[0]
+    cr.execute("""
+        INSERT INTO easy_exams_exam (name, course_id, access_code, duration, is_active)
+        SELECT 'Benchmark ' || g, %s, 'BENCH-' || g, 60, true FROM generate_series(1, %s) g
+    """, (course_id, EXAMS))
+    cr.execute("""
+        INSERT INTO easy_exams_question (exam_id, question_type, content)
+        SELECT e.id, CASE WHEN g > %s THEN 'matching' ELSE 'multiple_choice' END, 'Question ' || g
+        FROM easy_exams_exam e, generate_series(1, %s) g
+        WHERE e.course_id = %s
+    """, (QUESTIONS_PER_EXAM - MATCHING_QUESTIONS, QUESTIONS_PER_EXAM, course_id))
+    cr.execute("""
+        INSERT INTO easy_exams_question_option (question_id, content, is_correct, sequence)
+        SELECT q.id, 'Option ' || g, g = 1, g
+        FROM easy_exams_question q
+        JOIN easy_exams_exam e ON e.id = q.exam_id
+        CROSS JOIN generate_series(1, 4) g
+        WHERE e.course_id = %s AND q.question_type = 'multiple_choice'
+    """, (course_id,))
+    cr.execute("""
+        INSERT INTO easy_exams_question_pair (question_id, term, match, sequence)
+        SELECT q.id, 'Term ' || g, 'Match ' || g, g
+        FROM easy_exams_question q
+        JOIN easy_exams_exam e ON e.id = q.exam_id
+        CROSS JOIN generate_series(1, 3) g
+        WHERE e.course_id = %s AND q.question_type = 'matching'
+    """, (course_id,))
+    cr.execute("""
+        INSERT INTO easy_exams_exam_attempt (exam_id, student_name, student_id, start_time, end_time, deadline, score)
+        SELECT e.id, 'Student ' || g, 'S' || g,
+               now() at time zone 'UTC' - (g || ' minutes')::interval,
+               now() at time zone 'UTC' - (g || ' minutes')::interval + interval '50 minutes',
+               now() at time zone 'UTC' - (g || ' minutes')::interval + interval '60 minutes',
+               0
+        FROM easy_exams_exam e, generate_series(1, %s) g
+        WHERE e.course_id = %s
+    """, (ATTEMPTS_PER_EXAM, course_id))
+    cr.execute("""
+        INSERT INTO easy_exams_question_answer (attempt_id, question_id, answer_text, is_correct, q_score)
+        SELECT a.id, q.id, '', random() > 0.5, round(random())
+        FROM easy_exams_exam_attempt a
+        JOIN easy_exams_exam e ON e.id = a.exam_id
+        JOIN easy_exams_question q ON q.exam_id = a.exam_id
+        WHERE e.course_id = %s
+    """, (course_id,))
+    cr.execute("""
+        INSERT INTO easy_exams_answer_option (answer_id, question_option)
+        SELECT ans.id, o.id
+        FROM easy_exams_question_answer ans
+        JOIN easy_exams_question q ON q.id = ans.question_id
+        JOIN easy_exams_exam e ON e.id = q.exam_id
+        JOIN easy_exams_question_option o ON o.question_id = ans.question_id AND o.sequence = 1 + ans.id %% 4
+        WHERE e.course_id = %s
+    """, (course_id,))
+    cr.execute("""
+        INSERT INTO easy_exams_question_answer_pair (answer_id, question_pair_id, selected_match)
+        SELECT ans.id, p.id, p.match
+        FROM easy_exams_question_answer ans
+        JOIN easy_exams_question q ON q.id = ans.question_id
+        JOIN easy_exams_exam e ON e.id = q.exam_id
+        JOIN easy_exams_question_pair p ON p.question_id = ans.question_id
+        WHERE e.course_id = %s
+    """, (course_id,))
+    cr.execute("SELECT count(*) FROM easy_exams_question_answer ans JOIN easy_exams_exam_attempt a ON a.id = ans.attempt_id JOIN easy_exams_exam e ON e.id = a.exam_id WHERE e.course_id = %s", (course_id,))
+    print(f"Seeded {cr.fetchone()[0]} answers")
+    return course_id
+
+
+def sample_ids(cr, course_id):
+    cr.execute("SELECT id FROM easy_exams_exam WHERE course_id = %s ORDER BY id LIMIT 1 OFFSET %s", (course_id, EXAMS // 2))
+    exam_id = cr.fetchone()[0]
+    cr.execute("SELECT id FROM easy_exams_exam_attempt WHERE exam_id = %s ORDER BY id LIMIT 1 OFFSET %s", (exam_id, ATTEMPTS_PER_EXAM // 2))
+    attempt_id = cr.fetchone()[0]
+    cr.execute("SELECT id FROM easy_exams_question WHERE exam_id = %s AND question_type = 'matching' ORDER BY id LIMIT 1", (exam_id,))
+    question_id = cr.fetchone()[0]
+    cr.execute("SELECT id FROM easy_exams_question_answer WHERE attempt_id = %s AND question_id = %s", (attempt_id, question_id))
+    answer_id = cr.fetchone()[0]
+    return {'exam_id': exam_id, 'attempt_id': attempt_id, 'question_id': question_id, 'answer_id': answer_id}
+
+
+QUERIES = [
+    ("answers of an attempt",
+     "SELECT id FROM easy_exams_question_answer WHERE attempt_id = %(attempt_id)s"),
+    ("answer of (attempt, question)",
+     "SELECT id FROM easy_exams_question_answer WHERE attempt_id = %(attempt_id)s AND question_id = %(question_id)s"),
+    ("answers of a question",
+     "SELECT avg(q_score) FROM easy_exams_question_answer WHERE question_id = %(question_id)s"),
+    ("selected options of an answer",
+     "SELECT id FROM easy_exams_answer_option WHERE answer_id = %(answer_id)s"),
+    ("pairs of an answer",
+     "SELECT id FROM easy_exams_question_answer_pair WHERE answer_id = %(answer_id)s"),
+    ("attempts of an exam in a date range",
+     "SELECT id FROM easy_exams_exam_attempt WHERE exam_id = %(exam_id)s AND start_time >= (now() at time zone 'UTC') - interval '2 hours'"),
+    ("questions of an exam",
+     "SELECT id FROM easy_exams_question WHERE exam_id = %(exam_id)s"),
+]
+
+
+def measure(cr, params, label):
+    print(f"\n===== {label} =====")
+    for name, query in QUERIES:
+        cr.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params)
+        plan = "\n".join(row[0] for row in cr.fetchall())
+        timings = []
+        for _run in range(REPEAT):
+            start = time.perf_counter()
+            cr.execute(query, params)
+            cr.fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"\n--- {name}: median {statistics.median(timings):.3f} ms, max {max(timings):.3f} ms")
+        print(plan)
+
+
+def drop_secondary_indexes(cr):
+    cr.execute("""
+        SELECT i.relname
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        JOIN pg_class t ON t.oid = x.indrelid
+        WHERE t.relname = ANY(%s) AND NOT x.indisprimary AND NOT x.indisunique
+    """, (TABLES,))
+    names = [row[0] for row in cr.fetchall()]
+    for name in names:
+        cr.execute(f'DROP INDEX "{name}"')
+    print(f"Dropped {len(names)} indexes: {', '.join(sorted(names))}")
+
+
+def analyze(cr):
+    for table in TABLES:
+        cr.execute(f"ANALYZE {table}")
+
+
+def main(cr):
+    try:
+        course_id = seed(cr)
+        params = sample_ids(cr, course_id)
+        cr.execute("SAVEPOINT bench_indexes")
+        drop_secondary_indexes(cr)
+        analyze(cr)
+        measure(cr, params, "without indexes")
+        cr.execute("ROLLBACK TO SAVEPOINT bench_indexes")
+        analyze(cr)
+        measure(cr, params, "with indexes")
+    finally:
+        cr.rollback()
+
+
+main(env.cr)  # noqa: F821 - env is provided by the Odoo shell
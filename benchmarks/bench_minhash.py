@@ -0,0 +1,93 @@
+"""
+Benchmark of the MinHash/LSH near duplicate detection on 10k long answers of one question.
+
+Standalone, no Odoo or database needed (only NumPy):
+
+    python benchmarks/bench_minhash.py
+
+Random answers are generated from a shared vocabulary and a number of them are copies of
+another answer with a few words changed. The LSH candidate search is compared with the
+naive pairwise Jaccard comparison, timed on a sample and extrapolated (it grows with n^2).
+"""
+import importlib.util
+import os
+import random
+import time
+
+ANSWERS = 10000
+COPIES = 200
+EDIT_RATE = 0.05
+WORDS_PER_ANSWER = (80, 160)
+VOCABULARY = 3000
+THRESHOLD = 0.5
+PAIRWISE_SAMPLE = 1000
+
+
+def load_minhash():
+    path = os.path.join(os.path.dirname(__file__), '..', 'tools', 'minhash.py')
+    spec = importlib.util.spec_from_file_location('easy_exams_minhash', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def generate(rng):
+    vocabulary = [f"word{index}" for index in range(VOCABULARY)]
+    answers = [
+        ' '.join(rng.choice(vocabulary) for _word in range(rng.randint(*WORDS_PER_ANSWER)))
+        for _answer in range(ANSWERS - COPIES)
+    ]
+    planted = set()
+    for _copy in range(COPIES):
+        source = rng.randrange(len(answers))
+        words = answers[source].split()
+        for index in range(len(words)):
+            if rng.random() < EDIT_RATE:
+                words[index] = rng.choice(vocabulary)
+        answers.append(' '.join(words))
+        planted.add((source, len(answers) - 1))
+    return answers, planted
+
+
+def jaccard(first, second):
+    return len(first & second) / len(first | second) if first or second else 0.0
+
+
+def main():
+    minhash = load_minhash()
+    answers, planted = generate(random.Random(42))
+    print(f"{len(answers)} answers, {len(planted)} planted copies ({EDIT_RATE:.0%} of the words edited)")
+
+    start = time.perf_counter()
+    signatures = [minhash.signature(answer) for answer in answers]
+    signing = time.perf_counter() - start
+
+    start = time.perf_counter()
+    buckets = [(index, minhash.band_buckets(sig)) for index, sig in enumerate(signatures)]
+    banding = time.perf_counter() - start
+
+    start = time.perf_counter()
+    candidates = minhash.candidate_pairs(buckets)
+    found = {pair for pair in candidates if minhash.similarity(signatures[pair[0]], signatures[pair[1]]) >= THRESHOLD}
+    searching = time.perf_counter() - start
+
+    print(f"\n--- MinHash/LSH ({minhash.NUM_PERM} permutations, {minhash.BANDS} bands of {minhash.ROWS} rows)")
+    print(f"signatures: {signing:.2f} s ({signing / len(answers) * 1000:.3f} ms per answer)")
+    print(f"band buckets: {banding:.2f} s")
+    print(f"candidate search and verification: {searching:.3f} s, {len(candidates)} candidates, {len(found)} pairs reported")
+    print(f"recall of the planted copies: {len(found & planted) / len(planted):.1%}, other pairs reported: {len(found - planted)}")
+
+    shingles = [set(minhash.shingle_hashes(answer).tolist()) for answer in answers[:PAIRWISE_SAMPLE]]
+    start = time.perf_counter()
+    for first in range(len(shingles)):
+        for second in range(first + 1, len(shingles)):
+            jaccard(shingles[first], shingles[second])
+    sample = time.perf_counter() - start
+    pairs_sample = PAIRWISE_SAMPLE * (PAIRWISE_SAMPLE - 1) / 2
+    pairs_total = len(answers) * (len(answers) - 1) / 2
+    print("\n--- Naive pairwise Jaccard")
+    print(f"{PAIRWISE_SAMPLE} answers: {sample:.2f} s, extrapolated to {len(answers)} answers: {sample * pairs_total / pairs_sample:.0f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""
+Load test of a live exam: N virtual students take an exam through the real HTTP routes.
+
+Every student creates an attempt, loads the questions, answers them one by one with a
+think time between answers (revising some of them), reloads its answers and finishes.
+The grading calls go to a mock DeepSeek server started by the script, so the run costs
+nothing and the grading latency is under control.
+
+Requires aiohttp (pip install aiohttp). Against a local Odoo with the module installed,
+an active exam and its access code:
+
+    # once, in the database: point the grading at the mock server
+    #   exams_deep_seek = anything (the OpenAI client needs a key)
+    #   exams_deep_seek_base_url = http://127.0.0.1:8099
+    odoo-bin -d <database> --workers=4 --logfile=/tmp/odoo.log
+    python benchmarks/load_exam.py --url http://127.0.0.1:8069 --access-code ABC123 \\
+        --students 200 --ramp-up 60 --odoo-log /tmp/odoo.log
+
+With --odoo-log the per request SQL query count and time written by Odoo in its access log
+(werkzeug lines, log level info) are aggregated per route. Run it against a scratch
+database: the attempts and answers are kept.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import string
+import time
+from collections import defaultdict
+
+import aiohttp
+from aiohttp import web
+
+LOREM = (
+    "the answer depends on the context of the question and on the assumptions made by the "
+    "author so the result must be explained step by step with an example and a conclusion"
+).split()
+
+# "POST /api/exams/answers/create HTTP/1.1" 200 - 14 0.012 0.051
+ODOO_ACCESS_LINE = re.compile(r'"(GET|POST|PUT|DELETE) (\S+) HTTP/[\d.]+" (\d+) - (\d+) ([\d.]+) ([\d.]+)')
+
+
+def route_of(path):
+    """Path without query string and with the numeric segments replaced, to group requests per route"""
+    path = path.split('?', 1)[0]
+    return re.sub(r'/\d+(?=/|$)', '/<id>', path)
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, route, latency, ok):
+        self.latencies[route].append(latency)
+        if not ok:
+            self.errors[route] += 1
+
+
+class Student:
+    def __init__(self, index, session, args, stats):
+        self.index = index
+        self.session = session
+        self.args = args
+        self.stats = stats
+        self.token = None
+
+    async def think(self):
+        await asyncio.sleep(random.uniform(self.args.think_min, self.args.think_max))
+
+    async def call(self, method, path, params=None, json_rpc=False):
+        """Call a route, record its latency and outcome. Return the payload of a success or None."""
+        headers = {'Authorization': f'Bearer {self.token}'} if self.token else {}
+        kwargs = {'headers': headers}
+        if json_rpc:
+            kwargs['json'] = {'jsonrpc': '2.0', 'method': 'call', 'params': params or {}}
+        elif params:
+            kwargs['params'] = params
+        start = time.perf_counter()
+        body, ok = None, False
+        try:
+            async with self.session.request(method, self.args.url + path, **kwargs) as response:
+                body = await response.json(content_type=None)
+                ok = response.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError):
+            pass
+        latency = time.perf_counter() - start
+        if ok and json_rpc:
+            body = body.get('result') if isinstance(body, dict) and 'error' not in body else None
+        ok = ok and isinstance(body, dict) and body.get('status') == 'success'
+        self.stats.record(route_of(path), latency, ok)
+        return body.get('data') if ok else None
+
+    def answer_payload(self, question):
+        question_type = question['question_type']
+        if question_type == 'multiple_choice' and question.get('options'):
+            return {'selected_options': [random.choice(question['options'])['id']]}
+        if question_type == 'matching' and question.get('pairs'):
+            return {'selected_pairs': [
+                {'question_pair_id': pair['id'], 'selected_match': random.choice(question['matches'])}
+                for pair in question['pairs']
+            ]}
+        if question_type == 'fill_in_the_blank':
+            blanks = question['content'].count('{{}}') or 1
+            return {'answer_text': json.dumps([{'value': random.choice(LOREM)} for _blank in range(blanks)])}
+        words = random.randint(30, 120) if question_type == 'long_answer' else random.randint(3, 15)
+        return {'answer_text': ' '.join(random.choice(LOREM) for _word in range(words))}
+
+    async def run(self):
+        attempt = await self.call('POST', '/api/exams/attempts/create', {
+            'student_name': f'Load Student {self.index}',
+            'student_id': f'LOAD-{self.index}-' + ''.join(random.choices(string.ascii_uppercase, k=4)),
+            'access_code': self.args.access_code,
+        }, json_rpc=True)
+        if not attempt:
+            return
+        self.token = attempt['token']
+
+        questions = await self.call('GET', '/api/exams/raw_questions')
+        if questions is None:
+            return
+
+        answer_ids = {}
+        for question in questions:
+            await self.think()
+            payload = dict(self.answer_payload(question), question_id=question['id'])
+            answer = await self.call('POST', '/api/exams/answers/create', payload, json_rpc=True)
+            if answer:
+                answer_ids[question['id']] = answer['id']
+
+        for question in questions:
+            if question['id'] in answer_ids and random.random() < self.args.revise:
+                await self.think()
+                payload = dict(self.answer_payload(question), answer_id=answer_ids[question['id']])
+                await self.call('PUT', '/api/exams/answers/update', payload, json_rpc=True)
+
+        await self.call('GET', '/api/exams/raw_answers')
+        await self.call('PUT', '/api/exams/attempts/update/finished', {}, json_rpc=True)
+
+
+async def mock_grading_server(port, latency):
+    """OpenAI compatible chat completions endpoint answering a score after latency seconds"""
+    async def completions(request):
+        await asyncio.sleep(random.uniform(*latency))
+        return web.json_response({
+            'id': 'mock',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': 'deepseek-chat',
+            'choices': [{
+                'index': 0,
+                'finish_reason': 'stop',
+                'message': {'role': 'assistant', 'content': str(random.choice([0, 0.5, 0.8, 1]))},
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 1, 'total_tokens': 1},
+        })
+
+    app = web.Application()
+    app.router.add_post('/chat/completions', completions)
+    app.router.add_post('/v1/chat/completions', completions)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    return runner
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def read_odoo_queries(path, offset):
+    """Query count and SQL time per route from the Odoo access log lines written after offset"""
+    queries = defaultdict(list)
+    with open(path, encoding='utf-8', errors='replace') as log:
+        log.seek(offset)
+        for line in log:
+            match = ODOO_ACCESS_LINE.search(line)
+            if match:
+                _method, path_, _status, count, sql_time, _other_time = match.groups()
+                queries[route_of(path_)].append((int(count), float(sql_time)))
+    return queries
+
+
+def report(stats, elapsed, queries):
+    total = sum(len(latencies) for latencies in stats.latencies.values())
+    errors = sum(stats.errors.values())
+    print(f"\n{total} requests in {elapsed:.1f} s: {total / elapsed:.1f} req/s, {errors} errors ({errors / max(total, 1):.1%})\n")
+    header = f"{'route':45} {'count':>6} {'req/s':>7} {'err%':>6} {'p50 ms':>8} {'p90 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    if queries is not None:
+        header += f" {'queries':>8} {'sql ms':>8}"
+    print(header)
+    for route in sorted(stats.latencies):
+        latencies = stats.latencies[route]
+        line = (
+            f"{route:45} {len(latencies):>6} {len(latencies) / elapsed:>7.2f} "
+            f"{stats.errors[route] / len(latencies):>6.1%} "
+            + ' '.join(f"{percentile(latencies, q) * 1000:>8.1f}" for q in (0.5, 0.9, 0.95, 0.99))
+            + f" {max(latencies) * 1000:>8.1f}"
+        )
+        if queries is not None:
+            samples = queries.get(route)
+            if samples:
+                line += f" {statistics.mean(count for count, _time in samples):>8.1f} {statistics.mean(sql for _count, sql in samples) * 1000:>8.1f}"
+            else:
+                line += f" {'-':>8} {'-':>8}"
+        print(line)
+
+
+async def main(args):
+    mock = await mock_grading_server(args.mock_port, (args.mock_latency_min, args.mock_latency_max)) if args.mock_port else None
+    log_offset = None
+    if args.odoo_log:
+        with open(args.odoo_log, 'rb') as log:
+            log_offset = log.seek(0, 2)
+
+    stats = Stats()
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=args.connections)
+    start = time.perf_counter()
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        async def student(index):
+            await asyncio.sleep(args.ramp_up * index / max(args.students, 1))
+            await Student(index, session, args, stats).run()
+        await asyncio.gather(*(student(index) for index in range(args.students)))
+    elapsed = time.perf_counter() - start
+
+    if mock:
+        await mock.cleanup()
+    # Odoo writes the access line once the response is sent, leave it a moment.
+    await asyncio.sleep(1 if args.odoo_log else 0)
+    queries = read_odoo_queries(args.odoo_log, log_offset) if args.odoo_log else None
+    report(stats, elapsed, queries)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n', 1)[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8069', help="Odoo base URL")
+    parser.add_argument('--access-code', required=True, help="Access code of an active exam")
+    parser.add_argument('--students', type=int, default=50, help="Number of virtual students")
+    parser.add_argument('--ramp-up', type=float, default=30, help="Seconds over which the students start")
+    parser.add_argument('--think-min', type=float, default=2, help="Minimum think time between answers (s)")
+    parser.add_argument('--think-max', type=float, default=10, help="Maximum think time between answers (s)")
+    parser.add_argument('--revise', type=float, default=0.2, help="Share of the answers revised with an update")
+    parser.add_argument('--connections', type=int, default=100, help="Maximum simultaneous HTTP connections")
+    parser.add_argument('--timeout', type=float, default=60, help="Request timeout (s)")
+    parser.add_argument('--mock-port', type=int, default=8099, help="Port of the mock grading server, 0 to not start it")
+    parser.add_argument('--mock-latency-min', type=float, default=0.3, help="Minimum mock grading latency (s)")
+    parser.add_argument('--mock-latency-max', type=float, default=1.5, help="Maximum mock grading latency (s)")
+    parser.add_argument('--odoo-log', help="Odoo log file, to report the SQL queries per route")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
@@ -7,4 +7,6 @@ from . import answers
 from . import attempts
 from . import options_pair
 from . import options
-from . import questions
\ No newline at end of file
+from . import questions
+from . import analytics
+from . import metrics
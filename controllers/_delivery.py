@@ -0,0 +1,112 @@
+import random
+import re
+from odoo.http import request
+
+from ..tools.cache import LRUCache
+from ._helpers import _remember_access_code
+
+# Bytes of delivery payloads kept per process: the images make up most of them.
+DELIVERY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+def _payload_size(payload):
+    """Approximate size of a delivery payload, its text and images."""
+    size = 0
+    for question in payload:
+        size += len(question['content'] or '') + len(question['image'] or '')
+        size += sum(len(option['content'] or '') for option in question.get('options', ()))
+        size += sum(len(pair['term'] or '') for pair in question.get('pairs', ()))
+        size += sum(len(match or '') for match in question.get('matches', ()))
+    return size
+
+# (database, exam id, exam content version) -> questions as delivered to students, not shuffled.
+_delivery_cache = LRUCache(max_size=64, max_weight=DELIVERY_CACHE_MAX_BYTES, weigher=_payload_size)
+
+def _build_delivery_payload(exam):
+    """
+    Build the student view of the questions of the exam: no correct answers,
+    blanks removed and images in their delivery size.
+    """
+    questions = request.env['easy_exams.question'].sudo().search([('exam_id', '=', exam.id)])
+    question_data = []
+    for q in questions:
+        image = q.image_1024.decode('utf-8') if q.image_1024 else None
+        if q.question_type == 'multiple_choice':
+            question_data.append({
+                'id': q.id,
+                'question_type': q.question_type,
+                'content': q.content,
+                'image': image,
+                'options': [{'id': opt.id, 'content': opt.content} for opt in q.option_ids]
+            })
+        if q.question_type == 'fill_in_the_blank':
+            regex = r'\{\{.*?\}\}'
+            question_data.append({
+                'id': q.id,
+                'question_type': q.question_type,
+                'content': re.sub(regex, '{{}}', q.content),
+                'image': image,
+            })
+        if q.question_type == 'short_answer' or q.question_type == 'long_answer':
+            question_data.append({
+                'id': q.id,
+                'question_type': q.question_type,
+                'content': q.content,
+                'image': image,
+            })
+        if q.question_type == 'matching':
+            question_data.append({
+                'id': q.id,
+                'question_type': q.question_type,
+                'content': q.content,
+                'image': image,
+                'pairs': [{'id': pair.id, 'term': pair.term} for pair in q.pair_ids],
+                'matches': [pair.match for pair in q.pair_ids]
+            })
+    return tuple(question_data)
+
+def get_delivery_payload(exam):
+    """
+    Return the (cached) student view of the questions of the exam, in a stable order.
+    The cache key holds the exam content version, so edits are seen by every worker.
+    """
+    key = (request.db, exam.id, exam.content_version)
+    payload = _delivery_cache.get(key)
+    if payload is None:
+        payload = _build_delivery_payload(exam)
+        _delivery_cache.set(key, payload)
+    return payload
+
+def select_delivery_questions(payload, attempt):
+    """
+    Keep the questions of payload drawn for the attempt, when its exam has question pools.
+    """
+    if not attempt.question_draw:
+        return payload
+    question_ids = set(attempt._get_question_ids())
+    return tuple(question for question in payload if question['id'] in question_ids)
+
+def shuffle_delivery_payload(payload):
+    """
+    Return a copy of payload with the questions, the options and the matches shuffled.
+    The cached payload itself is never modified.
+    """
+    question_data = []
+    for question in payload:
+        question = dict(question)
+        if 'options' in question:
+            question['options'] = random.sample(question['options'], len(question['options']))
+        if 'matches' in question:
+            question['matches'] = random.sample(question['matches'], len(question['matches']))
+        question_data.append(question)
+    random.shuffle(question_data)
+    return question_data
+
+def warm_exam_caches(exam):
+    """
+    Prepare the caches used when the students start the exam: the access code lookup
+    and the delivery payload (questions, options, pairs and resized images) of this worker.
+    Building the payload also loads the exam rows and images in the database buffers
+    for the other workers.
+    """
+    _remember_access_code(exam)
+    get_delivery_payload(exam)
@@ -1,5 +1,16 @@
 import json, random, string
-from odoo.http import Response
+from odoo.exceptions import ValidationError
+from odoo.http import request, Response
+from psycopg2 import errors
+
+from ..tools.cache import LRUCache
+
+# The errors Odoo retries the whole request on (odoo.service.model.retrying): the handlers
+# writing concurrently contended rows re-raise them instead of answering a 500.
+CONCURRENCY_ERRORS = (errors.LockNotAvailable, errors.SerializationFailure, errors.DeadlockDetected)
+
+# (database, access code) -> id of the active exam using it.
+_access_code_cache = LRUCache(max_size=4096, ttl=3600)
 
 def _http_success_response(data, message="Request successful", status=200):
     """
@@ -63,3 +74,99 @@ def _generate_code(length=6):
     code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
 
     return code
+
+def _generate_unique_code(model_name, field_name, length=6, max_tries=10):
+    """
+    Generate a random code that is not used yet by field_name of model_name.
+    The uniqueness is enforced by a database constraint, this only avoids hitting it.
+    """
+    model = request.env[model_name].sudo().with_context(active_test=False)
+    for _try in range(max_tries):
+        code = _generate_code(length)
+        if not model.search_count([(field_name, '=', code)], limit=1):
+            return code
+    raise ValidationError("Could not generate a unique code, please try again")
+
+def _find_active_exam_by_code(access_code):
+    """
+    Return the active exam with the given access code (empty recordset if none).
+    Codes of active exams are remembered so the lookup is a primary key read.
+    """
+    exams = request.env['easy_exams.exam'].sudo()
+    exam_id = _access_code_cache.get((request.db, access_code))
+    if exam_id:
+        exam = exams.browse(exam_id).exists()
+        if exam and exam.access_code == access_code and exam.is_active:
+            return exam
+        _access_code_cache.pop((request.db, access_code))
+
+    exam = exams.search([('access_code', '=', access_code)], limit=1)
+    if exam and exam.is_active:
+        _remember_access_code(exam)
+    return exam
+
+def _remember_access_code(exam):
+    _access_code_cache.set((request.db, exam.access_code), exam.id)
+
+def _forget_access_code(access_code):
+    _access_code_cache.pop((request.db, access_code))
+
+def _sync_child_rows(existing, desired, field_names, parent_vals):
+    """
+    Apply the full desired list of child rows to the current ones with the minimum of writes.
+    Rows with the 'id' of an existing record are written only when a value changed, rows
+    without 'id' are created in a single batch and the records left out are deleted.
+    :param existing: Recordset with the current child rows.
+    :param desired: List of dicts describing the wanted rows, in order.
+    :param field_names: Fields compared and written for every row.
+    :param parent_vals: Values added to every created row (e.g. the parent id).
+    :return: Recordset with the resulting rows, in the desired order.
+    """
+    by_id = {record.id: record for record in existing}
+
+    # Check every id before writing anything, a bad row must not leave the others half applied.
+    row_ids = []
+    for row in desired:
+        row_id = row.get('id')
+        if row_id:
+            try:
+                row_id = int(row_id)
+            except (TypeError, ValueError):
+                raise ValidationError(f"Invalid row id: {row_id}")
+            if row_id not in by_id or row_id in row_ids:
+                raise ValidationError(f"Row {row_id} does not belong to this record or is repeated")
+        row_ids.append(row_id or None)
+
+    kept_ids = {row_id for row_id in row_ids if row_id}
+    to_create = []
+    order = []
+    # The controllers commit the transaction when they answer an error, constraints failing
+    # halfway must not leave the first rows written either.
+    with existing.env.cr.savepoint():
+        for sequence, (row, row_id) in enumerate(zip(desired, row_ids)):
+            vals = {name: row[name] for name in field_names if name in row}
+            vals['sequence'] = sequence
+            if row_id:
+                record = by_id[row_id]
+                changed = {name: value for name, value in vals.items() if record[name] != value}
+                if changed:
+                    record.write(changed)
+                order.append(record.id)
+            else:
+                to_create.append(dict(parent_vals, **vals))
+                order.append(None)
+
+        to_delete = existing.filtered(lambda record: record.id not in kept_ids)
+        if to_delete:
+            to_delete.unlink()
+
+        created = iter(existing.create(to_create).ids if to_create else [])
+        order = [record_id or next(created) for record_id in order]
+    return existing.browse(order)
+
+def _managed_course_ids(user_id):
+    """
+    Return the (cached) set of course ids the user can manage.
+    """
+    courses = request.env['easy_exams.course'].sudo()
+    return courses._get_managed_course_ids(user_id, courses._member_version(user_id))
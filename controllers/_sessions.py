@@ -0,0 +1,90 @@
+import collections
+import datetime
+import time
+from odoo.http import request
+
+from ..tools.cache import LRUCache
+
+# Seconds accepted after the deadline, same margin as the attempt token expiration.
+DEADLINE_GRACE = 60
+# Seconds a cached state is trusted before being re-read, bounds staleness between workers.
+# Revoked attempts no longer exist, so that state is kept until evicted.
+OPEN_SESSION_TTL = 30
+
+AttemptSession = collections.namedtuple('AttemptSession', ['deadline', 'finished', 'revoked'])
+
+_REVOKED = AttemptSession(deadline=0, finished=True, revoked=True)
+
+def _timestamp(value):
+    """Convert an Odoo (naive UTC) datetime to a unix timestamp"""
+    if not value:
+        return None
+    return value.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+class AttemptSessions:
+    """
+    In-memory registry of the state of the exam attempts being answered.
+    Answer endpoints read it to reject late or revoked submissions without browsing
+    easy_exams.exam_attempt, the database is read only on a miss.
+    """
+
+    _registry = LRUCache(max_size=20000)
+
+    @classmethod
+    def _store(cls, attempt_id, session):
+        expires_at = None
+        if not session.revoked:
+            expires_at = time.time() + OPEN_SESSION_TTL
+            if not session.finished and session.deadline is not None:
+                expires_at = min(expires_at, session.deadline + DEADLINE_GRACE)
+        cls._registry.set((request.db, attempt_id), session, expires_at=expires_at)
+        return session
+
+    @classmethod
+    def _load(cls, attempt_id):
+        request.env.cr.execute(
+            "SELECT deadline, end_time FROM easy_exams_exam_attempt WHERE id = %s",
+            (attempt_id,)
+        )
+        row = request.env.cr.fetchone()
+        if not row:
+            return cls._store(attempt_id, _REVOKED)
+        deadline, end_time = row
+        return cls._store(attempt_id, AttemptSession(deadline=_timestamp(deadline), finished=bool(end_time), revoked=False))
+
+    @classmethod
+    def get(cls, attempt_id):
+        """Return the AttemptSession of the attempt"""
+        session = cls._registry.get((request.db, attempt_id))
+        if session is None:
+            session = cls._load(attempt_id)
+        return session
+
+    @classmethod
+    def is_open(cls, attempt_id):
+        """Whether the attempt still accepts answers"""
+        session = cls.get(attempt_id)
+        if session.revoked or session.finished:
+            return False
+        return session.deadline is None or time.time() <= session.deadline + DEADLINE_GRACE
+
+    @classmethod
+    def register(cls, attempt):
+        """Add a new attempt to the registry"""
+        return cls._store(attempt.id, AttemptSession(deadline=_timestamp(attempt.deadline), finished=bool(attempt.end_time), revoked=False))
+
+    @classmethod
+    def finish(cls, attempt_id):
+        """Mark the attempt as finished, further answers are rejected"""
+        cls._store(attempt_id, AttemptSession(deadline=None, finished=True, revoked=False))
+
+    @classmethod
+    def revoke(cls, attempt_id):
+        """Mark the attempt as revoked (deleted by a teacher)"""
+        cls._store(attempt_id, _REVOKED)
+
+    @classmethod
+    def forget(cls, attempt_id):
+        """Drop the cached state so the next check reads the database"""
+        cls._registry.pop((request.db, attempt_id))
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+from odoo.exceptions import AccessDenied, ValidationError
+from .auth import JWTAuth
+from ..tools.cache import LRUCache
+from ._helpers import _http_success_response, _http_error_response, _managed_course_ids
+from ..tools.minhash import DEFAULT_THRESHOLD
+import logging, math
+
+_logger = logging.getLogger(__name__)
+
+# (database, exam id, event log version, content version) -> item analysis.
+# A new answer or grading logs an event, so the key changes as soon as new data arrives.
+_item_analysis_cache = LRUCache(max_size=128, ttl=600)
+
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75, 0.9)
+
+class ExamAnalyticsAPI(http.Controller):
+
+    ## 🔹 [GET] Item Analysis of an Exam
+    @http.route('/api/exams/analytics/items/<int:exam_id>', type='http', auth='public', methods=['GET'], csrf=False, cors="*")
+    def get_item_analysis(self, exam_id, **kwargs):
+        """
+        Difficulty, discrimination and option frequencies per question and Cronbach's alpha of an exam (JWT required)
+        """
+        try:
+            user_data = JWTAuth.authenticate_request()
+            user_id = user_data.get("user_id")
+
+            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id', 'in', list(_managed_course_ids(user_id)))], limit=1)
+            if not exam:
+                return _http_error_response("Exam not found or unauthorized", 404)
+
+            log_version = request.env['easy_exams.attempt_event'].sudo()._log_version(exam.id)
+            key = (request.db, exam.id, log_version, exam.content_version)
+            analysis = _item_analysis_cache.get(key)
+            if analysis is None:
+                analysis = request.env['easy_exams.item_analysis'].sudo()._analyze_exam(exam.id)
+                _item_analysis_cache.set(key, analysis)
+
+            return _http_success_response(analysis, "Item analysis retrieved successfully")
+        except AccessDenied:
+            return _http_error_response("Unauthorized: Access Denied", 401)
+        except Exception as e:
+            _logger.error(f"Error computing item analysis: {str(e)}")
+            return _http_error_response(f"Error computing item analysis: {str(e)}", 500)
+
+    ## 🔹 [GET] Score Distribution of an Exam
+    @http.route('/api/exams/analytics/scores/<int:exam_id>', type='http', auth='public', methods=['GET'], csrf=False, cors="*")
+    def get_score_distribution(self, exam_id, bin_width=None, quantiles=None, student_id=None, **kwargs):
+        """
+        Histogram, quantiles and (with student_id) percentile rank of the finished attempts of an exam (JWT required)
+        """
+        try:
+            user_data = JWTAuth.authenticate_request()
+            user_id = user_data.get("user_id")
+
+            try:
+                bin_width = float(bin_width) if bin_width else 1.0
+                quantiles = tuple(float(q) for q in quantiles.split(',')) if quantiles else DEFAULT_QUANTILES
+            except ValueError:
+                return _http_error_response("bin_width and quantiles must be numbers", 400)
+            if not math.isfinite(bin_width) or bin_width <= 0:
+                return _http_error_response("bin_width must be greater than 0", 400)
+            if not quantiles or any(not math.isfinite(q) or q < 0 or q > 1 for q in quantiles):
+                return _http_error_response("quantiles must be between 0 and 1", 400)
+
+            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id', 'in', list(_managed_course_ids(user_id)))], limit=1)
+            if not exam:
+                return _http_error_response("Exam not found or unauthorized", 404)
+
+            distribution = request.env['easy_exams.item_analysis'].sudo()._score_distribution(
+                exam.id, bin_width=bin_width, quantiles=quantiles, student_id=student_id or None,
+            )
+            return _http_success_response(distribution, "Score distribution retrieved successfully")
+        except AccessDenied:
+            return _http_error_response("Unauthorized: Access Denied", 401)
+        except ValidationError as e:
+            return _http_error_response(str(e), 400)
+        except Exception as e:
+            _logger.error(f"Error computing score distribution: {str(e)}")
+            return _http_error_response(f"Error computing score distribution: {str(e)}", 500)
+
+    ## 🔹 [GET] Near Duplicate Long Answers of an Exam
+    @http.route('/api/exams/analytics/duplicates/<int:exam_id>', type='http', auth='public', methods=['GET'], csrf=False, cors="*")
+    def get_near_duplicates(self, exam_id, threshold=None, **kwargs):
+        """
+        Pairs of long answers of an exam that look copied from each other (JWT required)
+        Non-archived attempts only, 'archived_attempt_count' tells how many were left out.
+        """
+        try:
+            user_data = JWTAuth.authenticate_request()
+            user_id = user_data.get("user_id")
+
+            try:
+                threshold = float(threshold) if threshold else DEFAULT_THRESHOLD
+            except ValueError:
+                return _http_error_response("threshold must be a number", 400)
+            if threshold <= 0 or threshold > 1:
+                return _http_error_response("threshold must be greater than 0 and at most 1", 400)
+
+            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id', 'in', list(_managed_course_ids(user_id)))], limit=1)
+            if not exam:
+                return _http_error_response("Exam not found or unauthorized", 404)
+
+            duplicates = request.env['easy_exams.answer_signature'].sudo()._near_duplicates(exam.id, threshold=threshold)
+            return _http_success_response({
+                'exam_id': exam.id,
+                'threshold': threshold,
+                'pairs': duplicates,
+                'archived_attempt_count': request.env['easy_exams.exam_attempt'].sudo().search_count([('exam_id', '=', exam.id), ('is_archived', '=', True)]),
+            }, "Near duplicate answers retrieved successfully")
+        except AccessDenied:
+            return _http_error_response("Unauthorized: Access Denied", 401)
+        except Exception as e:
+            _logger.error(f"Error detecting near duplicate answers: {str(e)}")
+            return _http_error_response(f"Error detecting near duplicate answers: {str(e)}", 500)
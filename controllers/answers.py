@@ -2,12 +2,47 @@
 from odoo import http
 from odoo.http import request
 from odoo.exceptions import AccessDenied, ValidationError
-from ._helpers import _http_success_response, _http_error_response, _error_response, _success_response
+from ._helpers import _http_success_response, _http_error_response, _error_response, _success_response, CONCURRENCY_ERRORS
 import logging
 from .auth import JWTAuth
+from ._sessions import AttemptSessions
 
 _logger = logging.getLogger(__name__)
 
+def _asks_question(attempt_id, question_id):
+    """Whether the question is one of the questions asked in the attempt (drawn from the pools or all of the exam)"""
+    try:
+        question_id = int(question_id)
+    except (TypeError, ValueError):
+        return False
+    attempt = request.env['easy_exams.exam_attempt'].sudo().browse(attempt_id)
+    return question_id in attempt._get_question_ids()
+
+def _merge_drafts(answer_data, drafts):
+    """
+    Overlay the draft payloads on the answers, the way _update_from_payload would apply them.
+    Rows only in a draft have no id yet.
+    """
+    by_question = {answer['question_id']: answer for answer in answer_data}
+    for question_id, payload in drafts.items():
+        answer = by_question.get(question_id)
+        if answer is None:
+            answer = {'id': None, 'question_id': question_id, 'selected_options': [], 'pair_selected': [], 'answer_text': ''}
+            answer_data.append(answer)
+        if payload.get('selected_options'):
+            current = {opt['question_option_id']: opt['id'] for opt in answer['selected_options']}
+            answer['selected_options'] = [{'id': current.get(option_id), 'question_option_id': option_id}
+                                          for option_id in dict.fromkeys(payload['selected_options'])]
+        if payload.get('selected_pairs'):
+            current = {pair['question_pair_id']: pair['id'] for pair in answer['pair_selected']}
+            answer['pair_selected'] = [{
+                'id': current.get(pair['question_pair_id']),
+                'question_pair_id': pair['question_pair_id'],
+                'selected_match': pair['selected_match'],
+            } for pair in payload['selected_pairs']]
+        if 'answer_text' in payload:
+            answer['answer_text'] = payload['answer_text']
+
 class QuestionAnswerAPI(http.Controller):
     
     ## 🔹 [GET] Retrieve Answers by Attempt
@@ -27,19 +62,22 @@ class QuestionAnswerAPI(http.Controller):
             if not attempt:
                 return _error_response("Attempt not found", 404)
 
-            # Retrieve answers for the given attempt
-            answers = request.env['easy_exams.question_answer'].sudo().search([('attempt_id', '=', attempt_id)])
-
-            answer_data = [{
-                'id': answer.id,
-                'question': answer.question_id.read(['id', 'content', 'image','question_type'])[0],  # Ensure single dictionary output
-                'options': [{'id': opt.id, 'content': opt.content, 'is_correct': opt.is_correct} for opt in answer.question_id.option_ids],
-                'selected_options': [{'id': opt.id, 'question_option_id': opt.question_option.id} for opt in answer.selected_option_ids],
-                'pair_options': [{'id': opt.id, 'term': opt.term, 'match': opt.match} for opt in answer.question_id.pair_ids],
-                'pair_selected': [{'id': opt.id, 'question_pair_id': opt.question_pair_id, 'selected_match': opt.selected_match} for opt in answer.answer_pair_ids],
-                'answer_text': answer.answer_text,
-                'is_correct': answer.is_correct
-            } for answer in answers]
+            # Retrieve answers for the given attempt (from the archive once it is archived)
+            answers = attempt._get_answer_rows().get(attempt.id, [])
+            questions = request.env['easy_exams.question'].sudo().browse([answer['question_id'] for answer in answers])
+
+            answer_data = []
+            for answer, question in zip(answers, questions):
+                answer_data.append({
+                    'id': answer['id'],
+                    'question': question.read(['id', 'content', 'image','question_type'])[0] if question.exists() else {'id': answer['question_id']},
+                    'options': [{'id': opt.id, 'content': opt.content, 'is_correct': opt.is_correct} for opt in question.option_ids],
+                    'selected_options': [{'id': opt['id'], 'question_option_id': opt['option_id']} for opt in answer['selected_options']],
+                    'pair_options': [{'id': opt.id, 'term': opt.term, 'match': opt.match} for opt in question.pair_ids],
+                    'pair_selected': [{'id': opt['id'], 'question_pair_id': opt['question_pair_id'], 'selected_match': opt['selected_match']} for opt in answer['answer_pairs']],
+                    'answer_text': answer['answer_text'],
+                    'is_correct': answer['is_correct']
+                })
 
             return _http_success_response(answer_data, "Answers retrieved successfully")
         
@@ -71,7 +109,6 @@ class QuestionAnswerAPI(http.Controller):
 
             # Retrieve answers for the given attempt
             answers = request.env['easy_exams.question_answer'].sudo().search([('attempt_id', '=', attempt_id)])
-            print(answers.read())
             answer_data = [{
                 'id': answer.id,
                 'question_id': answer.question_id.id,
@@ -79,7 +116,12 @@ class QuestionAnswerAPI(http.Controller):
                 'pair_selected': [{'id': opt.id, 'question_pair_id': opt.question_pair_id.id, 'selected_match': opt.selected_match} for opt in answer.answer_pair_ids],
                 'answer_text': answer.answer_text,
             } for answer in answers]
-            print(answers.read())
+
+            # The pending drafts are merged in the response only: a read never writes the
+            # answers nor grades them, the cron and the finish path apply the drafts.
+            drafts = request.env['easy_exams.answer_draft'].sudo()._read_drafts(attempt.id)
+            if drafts:
+                _merge_drafts(answer_data, drafts)
             return _http_success_response(answer_data, "Answers (cleaned) retrieved successfully")
         
         except AccessDenied:
@@ -94,47 +136,32 @@ class QuestionAnswerAPI(http.Controller):
     @http.route('/api/exams/answers/create', type='json', auth='public', methods=['POST'], csrf=False, cors="*")
     def create_answer(self, **kwargs):
         """
-        Create a new answer for a question.
+        Create the answer for a question, or update it if the question was already answered
+        in this attempt. An optional idempotency key (field or 'Idempotency-Key' header) makes retries no-ops.
         """
         try:
             attempt_data = JWTAuth.authenticate_attempt()
             attempt_id = attempt_data['attempt_id']
 
             question_id = kwargs.get('question_id')
-
-            selected_options = kwargs.get('selected_options')
-            selected_pairs = kwargs.get('selected_pairs')
-
             answer_text = kwargs.get('answer_text', '')
 
             if not attempt_id or not question_id:
                 return _error_response("Attempt ID and Question ID are required", 400)
 
-            answer_data = {
-                'attempt_id': attempt_id,
-                'question_id': question_id,
-                'answer_text': answer_text,
-            }
+            if not AttemptSessions.is_open(attempt_id):
+                return _error_response("The exam attempt is closed or has expired", 403)
 
-            new_answer = request.env['easy_exams.question_answer'].sudo().create(answer_data)
-            
-            if selected_options:
-                [request.env['easy_exams.answer_option'].sudo().create({
-                    'question_option' : selected_option,
-                    'answer_id' : new_answer.id
-                }) for selected_option in selected_options]
+            if not _asks_question(attempt_id, question_id):
+                return _error_response("The question is not part of this exam attempt", 403)
+
+            payload = dict(kwargs, idempotency_key=kwargs.get('idempotency_key') or request.httprequest.headers.get('Idempotency-Key'))
+            new_answer = request.env['easy_exams.question_answer'].sudo()._upsert_from_payload(attempt_id, question_id, payload)
 
             selected_option_id = 0
             if new_answer.selected_option_ids:
                 selected_option_id = new_answer.selected_option_ids[0].question_option.id
 
-            if selected_pairs:
-                [request.env['easy_exams.question_answer_pair'].sudo().create({
-                    'answer_id' : new_answer.id,
-                    'question_pair_id' : selected_pair['question_pair_id'],
-                    'selected_match' : selected_pair['selected_match'],
-                }) for selected_pair in selected_pairs]
-
             selected_pairs_return = []
             if new_answer.answer_pair_ids:
                 for pair in new_answer.answer_pair_ids:
@@ -149,6 +176,8 @@ class QuestionAnswerAPI(http.Controller):
             return _http_error_response("Unauthorized: Access Denied", 401)
         except ValidationError as e:
             return _error_response(str(e), 400)
+        except CONCURRENCY_ERRORS:
+            raise
         except Exception as e:
             _logger.error(f"Error creating answer: {str(e)}")
             return _error_response(f"Error creating answer: {str(e)}", 500)
@@ -166,56 +195,62 @@ class QuestionAnswerAPI(http.Controller):
             attempt_id = attempt_data['attempt_id']
 
             answer_id = kwargs.get('answer_id') 
-            selected_options = kwargs.get('selected_options') #receives an list of ids
-            selected_pairs = kwargs.get('selected_pairs')
             if not answer_id:
                 return _error_response('Answer id is required', 400)
+
+            if not AttemptSessions.is_open(attempt_id):
+                return _error_response("The exam attempt is closed or has expired", 403)
             
             answer = request.env['easy_exams.question_answer'].sudo().browse(answer_id)
-            if not answer.exists():
+            if not answer.exists() or answer.attempt_id.id != attempt_id:
                 return _error_response("Answer not found", 404)
             
-            if selected_options:
+            payload = dict(kwargs, idempotency_key=kwargs.get('idempotency_key') or request.httprequest.headers.get('Idempotency-Key'))
+            answer._update_from_payload(payload)
 
-                answer.selected_option_ids.unlink()
+            return _success_response({'id': answer.id}, "Answer updated successfully")
 
-                new_options = [
-                    (0, 0, 
-                    {
-                        'question_option': selected_option, 
-                        'answer_id': answer.id
-                    })
-                    for selected_option in selected_options]
-                answer.write({'selected_option_ids': new_options})
-            
-            
-            if selected_pairs:
+        except AccessDenied:
+            return _http_error_response("Unauthorized: Access Denied", 401)
+        except CONCURRENCY_ERRORS:
+            raise
+        except Exception as e:
+            _logger.error(f"Error updating answer: {str(e)}")
+            return _error_response(f"Error updating answer: {str(e)}", 500)
 
-                answer.answer_pair_ids.unlink()
+    ## 🔹 [PUT] Autosave a Draft Answer
+    @http.route('/api/exams/answers/autosave', type='json', auth='public', methods=['PUT'], csrf=False, cors="*")
+    def autosave_answer(self, **kwargs):
+        """
+        Keep the latest draft of an answer while the student is typing.
+        Drafts are not graded, they are applied to the answer in batches and when the attempt is finished.
+        """
+        try:
+            attempt_data = JWTAuth.authenticate_attempt()
+            attempt_id = attempt_data['attempt_id']
 
-                new_pairs = [
-                    (0, 0, 
-                    {
-                        'answer_id': answer.id,
-                        'question_pair_id': selected_pair['question_pair_id'],
-                        'selected_match': selected_pair['selected_match']
-                    })
-                    for selected_pair in selected_pairs]
+            question_id = kwargs.get('question_id')
+            if not attempt_id or not question_id:
+                return _error_response("Attempt ID and Question ID are required", 400)
 
-                answer.write({'answer_pair_ids': new_pairs})
+            if not AttemptSessions.is_open(attempt_id):
+                return _error_response("The exam attempt is closed or has expired", 403)
 
-            update_data = {
-                'answer_text': kwargs.get('answer_text', answer.answer_text),
-            }
-            answer.sudo().write(update_data)
+            if not _asks_question(attempt_id, question_id):
+                return _error_response("The question is not part of this exam attempt", 403)
 
-            return _success_response({'id': answer.id}, "Answer updated successfully")
+            payload = {key: kwargs[key] for key in ('answer_text', 'selected_options', 'selected_pairs') if key in kwargs}
+            request.env['easy_exams.answer_draft'].sudo()._save_draft(attempt_id, question_id, payload)
+
+            return _success_response({'question_id': question_id}, "Draft saved successfully")
 
         except AccessDenied:
             return _http_error_response("Unauthorized: Access Denied", 401)
+        except CONCURRENCY_ERRORS:
+            raise
         except Exception as e:
-            _logger.error(f"Error updating answer: {str(e)}")
-            return _error_response(f"Error updating answer: {str(e)}", 500)
+            _logger.error(f"Error saving draft: {str(e)}")
+            return _error_response(f"Error saving draft: {str(e)}", 500)
 
     ## 🔹 [DELETE] Delete an Answer
     @http.route('/api/exams/answers/delete/<int:answer_id>', type='http', auth='public', methods=['DELETE'], csrf=False, cors="*")
@@ -1,13 +1,89 @@
 # -*- coding: utf-8 -*-
-from odoo import http, fields
-from odoo.http import request
+from odoo import http, fields, api, SUPERUSER_ID
+from odoo.http import request, Response
 from odoo.exceptions import AccessDenied, ValidationError
-from .auth import JWTAuth
-from ._helpers import _http_success_response, _http_error_response, _error_response, _success_response
-import logging, datetime
+from .auth import JWTAuth, STREAM_TOKEN_LIFETIME
+from ._sessions import AttemptSessions
+from ._helpers import _http_success_response, _http_error_response, _error_response, _success_response, _managed_course_ids, CONCURRENCY_ERRORS
+from ..tools.event_listener import listener
+import logging, datetime, json, threading, time
 
 _logger = logging.getLogger(__name__)
 
+# Minimum seconds between two reads of the event log, per open feed: the events logged
+# meanwhile are sent together.
+EVENTS_POLL_INTERVAL = 1
+# A server-sent events stream is closed after this many seconds, the browser reconnects
+# with Last-Event-ID. Keeps requests below the worker time limits.
+EVENTS_STREAM_DURATION = 55
+# Maximum wait of a long-poll request without new events.
+EVENTS_LONG_POLL_TIMEOUT = 25
+EVENTS_KEEP_ALIVE = 15
+# Every stream holds a worker (thread) for its whole duration: beyond this many per process,
+# the feed is refused and the clients fall back to mode=poll.
+EVENTS_MAX_STREAMS = 16
+
+_streams_lock = threading.Lock()
+_open_streams = 0
+
+def _fetch_events(registry, exam_id, cursor):
+    # A new cursor per read: the request transaction would never see the new events.
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        return env['easy_exams.attempt_event']._read_events(exam_id, cursor)
+
+def _next_events(registry, exam_id, cursor, timeout):
+    """
+    Events from cursor on and the cursor to resume from, waiting up to timeout seconds for a
+    notification of the exam (easy_exams.attempt_event._log) instead of reading the log again
+    and again. The events may have been returned by the previous read already.
+    """
+    version = listener.version(registry.db_name, exam_id)
+    events, cursor = _fetch_events(registry, exam_id, cursor)
+    if not events and listener.wait(registry.db_name, exam_id, version, timeout):
+        time.sleep(EVENTS_POLL_INTERVAL)
+        events, cursor = _fetch_events(registry, exam_id, cursor)
+    return events, cursor
+
+def _wait_for_events(registry, exam_id, cursor, timeout):
+    end = time.monotonic() + timeout
+    while True:
+        events, cursor = _next_events(registry, exam_id, cursor, max(end - time.monotonic(), 0))
+        if events or time.monotonic() >= end:
+            return events, cursor
+
+def _stream_events(registry, exam_id, cursor):
+    yield f"retry: {EVENTS_POLL_INTERVAL * 1000}\n\n"
+    end = time.monotonic() + EVENTS_STREAM_DURATION
+    sent = set()
+    while time.monotonic() < end:
+        events, next_cursor = _next_events(registry, exam_id, cursor, min(EVENTS_KEEP_ALIVE, max(end - time.monotonic(), 0)))
+        events = [event for event in events if event['id'] not in sent]
+        for index, event in enumerate(events):
+            sent.add(event['id'])
+            # Last-Event-ID moves to the new cursor with the last event of the read only: a
+            # reconnection in between resumes from the previous one.
+            event_cursor = next_cursor if index == len(events) - 1 else cursor
+            yield f"id: {event_cursor}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        cursor = next_cursor
+        if not events:
+            yield ": keep-alive\n\n"
+        else:
+            time.sleep(EVENTS_POLL_INTERVAL)
+
+def _acquire_stream():
+    global _open_streams
+    with _streams_lock:
+        if _open_streams >= EVENTS_MAX_STREAMS:
+            return False
+        _open_streams += 1
+        return True
+
+def _release_stream():
+    global _open_streams
+    with _streams_lock:
+        _open_streams -= 1
+
 class ExamAttemptAPI(http.Controller):
 
     ## 🔹 [GET] Retrieve Exam Attempts (Filtered by Exam ID)
@@ -20,7 +96,7 @@ class ExamAttemptAPI(http.Controller):
             user_data = JWTAuth.authenticate_request()
             user_id = user_data.get("user_id")
 
-            domain = [('exam_id.course_id.user_ids', 'in', user_id), ('exam_id', '=', exam_id)]
+            domain = [('exam_id.course_id', 'in', list(_managed_course_ids(user_id))), ('exam_id', '=', exam_id)]
 
             start_date = kwargs.get('start_date')
             end_date = kwargs.get('end_date')
@@ -60,7 +136,7 @@ class ExamAttemptAPI(http.Controller):
             user_data = JWTAuth.authenticate_request()
             user_id = user_data.get("user_id")
 
-            domain = [('exam_id.course_id.user_ids', 'in', user_id), ('exam_id', '=', exam_id)]
+            domain = [('exam_id.course_id', 'in', list(_managed_course_ids(user_id))), ('exam_id', '=', exam_id)]
 
             start_date = kwargs.get('start_date')
             end_date = kwargs.get('end_date')
@@ -72,6 +148,18 @@ class ExamAttemptAPI(http.Controller):
 
             attempts = request.env['easy_exams.exam_attempt'].sudo().search(domain)
 
+            # Archived attempts are read from their archive row, transparently.
+            answers_by_attempt = attempts._get_answer_rows()
+            answer_rows = [row for rows in answers_by_attempt.values() for row in rows]
+            options = request.env['easy_exams.question_option'].sudo().browse(list({
+                opt['option_id'] for row in answer_rows for opt in row['selected_options']
+            })).exists()
+            options = {opt.id: opt for opt in options}
+            pairs = request.env['easy_exams.question_pair'].sudo().browse(list({
+                pair['question_pair_id'] for row in answer_rows for pair in row['answer_pairs']
+            })).exists()
+            pairs = {pair.id: pair for pair in pairs}
+
             attempts_data = [{
                 'id': attempt.id,
                 'exam_id': attempt.exam_id.id,
@@ -81,42 +169,24 @@ class ExamAttemptAPI(http.Controller):
                 'end_time': attempt.end_time.isoformat() if attempt.end_time else None,
                 'score': attempt.score,
                 'answer_ids': [{
-                        'question_id': ans.question_id.id,
-                        # 'question': {
-                        #     'id' : ans.question_id.id,
-                        #     'question_type': ans.question_id.question_type,
-                        #     'content': ans.question_id.content,
-                        #     'image': ans.question_id.image.decode('utf-8') if ans.question_id.image else None,
-                        #     'correct_answer': ans.question_id.correct_answer,
-                        #     'options' : [{
-                        #             'id' : opt.id,
-                        #             'content' : opt.content,
-                        #             'is_correct' : opt.is_correct,
-                        #         }for opt in ans.question_id.option_ids],
-                        #     'pairs': [{
-                        #             'id' : pair.id,
-                        #             'term' : pair.term,
-                        #             'match' : pair.match,
-                        #         } for pair in ans.question_id.pair_ids],
-                        #  },
+                        'question_id': ans['question_id'],
                         'selected_options': [{
-                                'id': opt.id,
-                                'option_id': opt.question_option.id,
-                                'option_content': opt.question_option.content,
-                                'is_correct': opt.question_option.is_correct,
-                            }for opt in ans.selected_option_ids],
+                                'id': opt['id'],
+                                'option_id': opt['option_id'],
+                                'option_content': options[opt['option_id']].content if opt['option_id'] in options else None,
+                                'is_correct': options[opt['option_id']].is_correct if opt['option_id'] in options else None,
+                            }for opt in ans['selected_options']],
                         'answer_pairs': [{
-                            'id': pair.id,
-                            'question_pair_id': pair.question_pair_id.id,
-                            'question_pair_term': pair.question_pair_id.term,
-                            'question_pair_match': pair.question_pair_id.match,
-                            'selected_match': pair.selected_match
-                        }for pair in ans.answer_pair_ids],
-                        'answer_text' : ans.answer_text,
-                        'is_correct': ans.is_correct,
-                        'q_score': ans.q_score
-                        
-                    } for ans in attempt.answer_ids],
+                            'id': pair['id'],
+                            'question_pair_id': pair['question_pair_id'],
+                            'question_pair_term': pairs[pair['question_pair_id']].term if pair['question_pair_id'] in pairs else None,
+                            'question_pair_match': pairs[pair['question_pair_id']].match if pair['question_pair_id'] in pairs else None,
+                            'selected_match': pair['selected_match']
+                        }for pair in ans['answer_pairs']],
+                        'answer_text' : ans['answer_text'],
+                        'is_correct': ans['is_correct'],
+                        'q_score': ans['q_score']
+                    } for ans in answers_by_attempt.get(attempt.id, [])],
             } for attempt in attempts]
 
             return _http_success_response(attempts_data, "Exam attempts retrieved successfully.")
@@ -127,11 +197,98 @@ class ExamAttemptAPI(http.Controller):
             _logger.error(f"Error retrieving exam attempts: {str(e)}")
             return _http_error_response(f"Error retrieving exam attempts: {str(e)}", 500)
         
+    ## 🔹 [GET] Live Progress Feed of an Exam
+    @http.route('/api/exams/attempts/events/<int:exam_id>', type='http', auth='public', methods=['GET'], csrf=False, cors="*")
+    def get_exam_events(self, exam_id, **kwargs):
+        """
+        Feed of the progress events of an exam: attempt started, question answered, attempt finished
+        and answer graded (JWT required).
+        EventSource can not send headers: browsers pass instead, as 'access_token' parameter, a
+        stream token from /api/exams/attempts/events/<exam_id>/token. The query string ends up in
+        the access logs, so only these tokens are accepted there: valid for this exam's feed only
+        and for STREAM_TOKEN_LIFETIME. When the browser reconnection fails (expired token), the
+        client asks a new token and opens a new EventSource.
+        Server-sent events by default, with mode=poll waits for new events and returns them as JSON.
+        Resumes from the 'Last-Event-ID' header or the 'since' parameter (the 'cursor' of the
+        previous poll), else starts from now. An event may be sent again after a reconnection or
+        in the next poll: clients drop the event ids they already received.
+        In multi-worker deployments route this path to the gevent (longpolling) port.
+        """
+        try:
+            access_token = kwargs.get('access_token')
+            if access_token:
+                user_data = JWTAuth.decode_stream_token(access_token, exam_id)
+            else:
+                user_data = JWTAuth.authenticate_request()
+            user_id = user_data.get("user_id")
+
+            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id', 'in', list(_managed_course_ids(user_id)))], limit=1)
+            if not exam:
+                return _http_error_response("Exam not found or unauthorized", 404)
+
+            since = kwargs.get('since') or request.httprequest.headers.get('Last-Event-ID')
+            if since:
+                try:
+                    cursor = int(since)
+                except ValueError:
+                    return _http_error_response("since must be a feed cursor", 400)
+                if cursor < 0:
+                    return _http_error_response("since must be a feed cursor", 400)
+            else:
+                cursor = request.env['easy_exams.attempt_event'].sudo()._current_cursor()
+            registry = request.env.registry
+
+            if kwargs.get('mode') == 'poll':
+                events, cursor = _wait_for_events(registry, exam.id, cursor, EVENTS_LONG_POLL_TIMEOUT)
+                return _http_success_response({'events': events, 'cursor': cursor}, "Exam events retrieved successfully.")
+
+            if not _acquire_stream():
+                return _http_error_response("Too many live feeds open, use mode=poll", 503)
+            response = Response(
+                _stream_events(registry, exam.id, cursor),
+                content_type='text/event-stream',
+                headers=[('Cache-Control', 'no-cache'), ('X-Accel-Buffering', 'no')],
+                direct_passthrough=True,
+            )
+            response.call_on_close(_release_stream)
+            return response
+
+        except AccessDenied:
+            return _http_error_response("Unauthorized: Access Denied", 401)
+        except Exception as e:
+            _logger.error(f"Error retrieving exam events: {str(e)}")
+            return _http_error_response(f"Error retrieving exam events: {str(e)}", 500)
+
+    ## 🔹 [POST] Stream Token of the Live Progress Feed
+    @http.route('/api/exams/attempts/events/<int:exam_id>/token', type='json', auth='public', methods=['POST'], csrf=False, cors="*")
+    def get_exam_events_token(self, exam_id, **kwargs):
+        """
+        Short lived token opening the live progress feed of the exam from an EventSource (JWT required).
+        """
+        try:
+            user_data = JWTAuth.authenticate_request()
+            user_id = user_data.get("user_id")
+
+            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id', 'in', list(_managed_course_ids(user_id)))], limit=1)
+            if not exam:
+                return _error_response("Exam not found or unauthorized", 404)
+
+            return _success_response({
+                'access_token': JWTAuth.generate_stream_token(user_id, exam.id),
+                'expires_in': int(STREAM_TOKEN_LIFETIME.total_seconds()),
+            }, "Stream token generated successfully.")
+        except AccessDenied:
+            return _error_response("Unauthorized: Access Denied", 401)
+        except Exception as e:
+            _logger.error(f"Error generating the stream token: {str(e)}")
+            return _error_response(f"Error generating the stream token: {str(e)}", 500)
+
     ## 🔹 [POST] Create a New Exam Attempt
     @http.route('/api/exams/attempts/create', type='json', auth='public', methods=['POST'], csrf=False, cors="*")
     def create_exam_attempt(self, **kwargs):
         """
         Create a new exam attempt (Public - No JWT Required)
+        The empty answer of every question is created with it, 'answer_ids' maps question id -> answer id.
         """
         try:
             student_name = kwargs.get('student_name')
@@ -143,7 +300,7 @@ class ExamAttemptAPI(http.Controller):
                 return _error_response("Missing required fields", 400)
 
             # Search for the exam by access code
-            exam = request.env['easy_exams.exam'].sudo().search([('access_code', '=', access_code)], limit=1)
+            exam = _find_active_exam_by_code(access_code)
 
             if not exam:
                 return _error_response("Invalid access code or exam not found", 404)
@@ -157,11 +314,15 @@ class ExamAttemptAPI(http.Controller):
                 'exam_id': exam.id,
                 'student_name': student_name,
                 'student_id': student_id,
-                'start_time': kwargs.get('start_time', fields.Datetime.now()),
-                'end_time': kwargs.get('end_time', False),
-                'score': kwargs.get('score', 0),
+                # Set by the server only: the timer and the score can not come from the student.
+                'start_time': fields.Datetime.now(),
+                'end_time': False,
+                'score': 0,
             })
 
+            AttemptSessions.register(new_attempt)
+            answer_ids = new_attempt._create_answer_sheet()
+
             token_payload = {
                 'student_id': student_id,
                 'attempt_id': new_attempt.id,
@@ -170,7 +331,7 @@ class ExamAttemptAPI(http.Controller):
 
             jwt = JWTAuth.generate_attempt_token(token_payload, int(exam.duration))
 
-            return _success_response({'exam_time' : exam.duration, 'exam_name' : exam.name  ,'attempt_id': new_attempt.id, 'student_name': new_attempt.student_name, 'token': jwt, 'start_time': new_attempt.start_time, 'end_time': new_attempt.end_time  }, "Exam attempt created successfully.")
+            return _success_response({'exam_time' : exam.duration, 'exam_name' : exam.name  ,'attempt_id': new_attempt.id, 'student_name': new_attempt.student_name, 'token': jwt, 'start_time': new_attempt.start_time, 'end_time': new_attempt.end_time, 'answer_ids': answer_ids }, "Exam attempt created successfully.")
 
         except Exception as e:
             _logger.error(f"Error creating exam attempt: {str(e)}")
@@ -191,7 +352,7 @@ class ExamAttemptAPI(http.Controller):
                 return _error_response('Attempt id is required')
             
             attempt = request.env['easy_exams.exam_attempt'].sudo().browse(attempt_id)
-            if not attempt.exists() or not attempt.exam_id or not attempt.exam_id.course_id or user_id not in attempt.exam_id.course_id.user_ids.ids:
+            if not attempt.exists() or not attempt.exam_id or not attempt.exam_id.course_id or attempt.exam_id.course_id.id not in _managed_course_ids(user_id):
                 return _error_response("Unauthorized: Access Denied", 403)
 
             attempt.write({
@@ -201,6 +362,7 @@ class ExamAttemptAPI(http.Controller):
                 'end_time': kwargs.get('end_time', attempt.end_time),
                 'score': kwargs.get('score', attempt.score),
             })
+            AttemptSessions.forget(attempt.id)
 
             return _success_response({'id': attempt.id, 'student_name': attempt.student_name}, "Exam attempt updated successfully.")
 
@@ -227,14 +389,20 @@ class ExamAttemptAPI(http.Controller):
             attempt = request.env['easy_exams.exam_attempt'].sudo().browse(attempt_id)
             if not attempt.exists():
                 return _error_response('Exam attempt not found', 404)
-            attempt.write({
-                'end_time': kwargs.get('end_time', fields.Datetime.now())
-            })
+            request.env['easy_exams.answer_draft'].sudo()._flush_drafts(attempt_ids=[attempt.id])
+            if not attempt.end_time:
+                attempt.write({
+                    'end_time': fields.Datetime.now()
+                })
+            attempt._compute_final_score()
+            AttemptSessions.finish(attempt.id)
 
             return _success_response({'id': attempt.id, 'student_name': attempt.student_name}, "Exam attempt updated successfully.")
 
         except AccessDenied:
             return _error_response("Unauthorized: Access Denied", 401)
+        except CONCURRENCY_ERRORS:
+            raise
         except Exception as e:
             _logger.error(f"Error updating exam attempt: {str(e)}")
             return _error_response(f"Error updating exam attempt: {str(e)}", 500)
@@ -251,10 +419,11 @@ class ExamAttemptAPI(http.Controller):
 
             attempt = request.env['easy_exams.exam_attempt'].sudo().browse(attempt_id)
 
-            if not attempt.exists() or not attempt.exam_id or not attempt.exam_id.course_id or user_id not in attempt.exam_id.course_id.user_ids.ids:
+            if not attempt.exists() or not attempt.exam_id or not attempt.exam_id.course_id or attempt.exam_id.course_id.id not in _managed_course_ids(user_id):
                 return _http_error_response("Unauthorized: Access Denied", 403)
 
             attempt.unlink()
+            AttemptSessions.revoke(attempt_id)
 
             return _http_success_response({'id': attempt_id}, "Exam attempt deleted successfully.")
 
@@ -6,16 +6,26 @@ from odoo.http import request, Response
 from odoo.exceptions import AccessDenied
 
 from ._helpers import _success_response, _error_response
+from ..tools.auth_cache import SECRET_KEY_PARAM, secret_cache, token_cache
 
 _logger = logging.getLogger(__name__)
 
+ACCESS_TOKEN_LIFETIME = datetime.timedelta(minutes=30)
+# Tokens passed in a query string (live feeds) are logged by the access logs: keep them short.
+STREAM_TOKEN_LIFETIME = datetime.timedelta(minutes=2)
+STREAM_SCOPE = 'exam_events'
+
 class JWTAuth:
     """Middleware for handling JWT authentication"""
 
     @staticmethod
     def get_secret_key():
-        """Fetch secret key from Odoo system parameters"""
-        return request.env['ir.config_parameter'].sudo().get_param('easy_apps_secret_key', 'default_secret')
+        """Fetch secret key from Odoo system parameters (cached per database)"""
+        secret = secret_cache.get(request.db)
+        if secret is None:
+            secret = request.env['ir.config_parameter'].sudo().get_param(SECRET_KEY_PARAM, 'default_secret')
+            secret_cache.set(request.db, secret)
+        return secret
 
     @staticmethod
     def generate_token(user):
@@ -23,7 +33,7 @@ class JWTAuth:
         payload = {
             'user_id': user.id,
             'login': user.login,
-            'exp': datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=7)
+            'exp': datetime.datetime.now(datetime.timezone.utc) + ACCESS_TOKEN_LIFETIME
         }
         return jwt.encode(payload, JWTAuth.get_secret_key(), algorithm='HS256')
 
@@ -38,11 +48,38 @@ class JWTAuth:
             }
         return jwt.encode(token_payload, JWTAuth.get_secret_key(), algorithm='HS256')
 
+    @staticmethod
+    def generate_stream_token(user_id, exam_id):
+        """Generate a short lived JWT token only valid for the live feed of one exam"""
+        payload = {
+            'user_id': user_id,
+            'exam_id': exam_id,
+            'scope': STREAM_SCOPE,
+            'exp': datetime.datetime.now(datetime.timezone.utc) + STREAM_TOKEN_LIFETIME
+        }
+        return jwt.encode(payload, JWTAuth.get_secret_key(), algorithm='HS256')
+
+    @staticmethod
+    def decode_stream_token(token, exam_id):
+        """Verify a stream token of the live feed of the exam"""
+        claims = JWTAuth.decode_token(token)
+        if claims.get('scope') != STREAM_SCOPE or claims.get('exam_id') != exam_id:
+            raise AccessDenied("Invalid Token")
+        return claims
+
     @staticmethod
     def decode_token(token):
-        """Decode JWT token"""
+        """Decode JWT token, reusing the claims of tokens already verified until they expire"""
+        secret = JWTAuth.get_secret_key()
+        cache_key = (secret, token)
+        claims = token_cache.get(cache_key)
+        if claims is not None:
+            return dict(claims)
         try:
-            return jwt.decode(token, JWTAuth.get_secret_key(), algorithms=['HS256'])
+            claims = jwt.decode(token, secret, algorithms=['HS256'])
+            if 'exp' in claims:
+                token_cache.set(cache_key, claims, expires_at=claims['exp'])
+            return dict(claims)
         except jwt.ExpiredSignatureError:
             raise AccessDenied("Expired Token")
         except jwt.InvalidTokenError:
@@ -62,7 +99,8 @@ class JWTAuth:
         token = token.split(' ')[1]  # Extract actual token
         decoded_token = JWTAuth.decode_token(token)
 
-        if not decoded_token:
+        # Scoped tokens (live feed stream tokens) only open what they were made for.
+        if not decoded_token or decoded_token.get('scope'):
             raise AccessDenied("Invalid or expired token")
 
         return decoded_token
@@ -81,7 +119,8 @@ class JWTAuth:
         token = token.split(' ')[1]  # Extract actual token
         decoded_token = JWTAuth.decode_token(token)
 
-        if not decoded_token:
+        # Scoped tokens (live feed stream tokens) only open what they were made for.
+        if not decoded_token or decoded_token.get('scope'):
             raise AccessDenied("Invalid or expired token")
 
         return decoded_token
@@ -115,10 +154,69 @@ class JWTAuthController(http.Controller):
 
             # Generate JWT token
             token = JWTAuth.generate_token(user)
-
-            return _success_response({'token': token, 'user_id': user.id, 'login': user.login})
+            _refresh, refresh_token = request.env['easy_exams.refresh_token'].sudo()._issue(user)
+
+            return _success_response({
+                'token': token,
+                'refresh_token': refresh_token,
+                'expires_in': int(ACCESS_TOKEN_LIFETIME.total_seconds()),
+                'user_id': user.id,
+                'login': user.login
+            })
         except AccessDenied as e:
             return _error_response(str(e), 500)
         except Exception as e:
             _logger.error(str(e))
             return _error_response('Internal server error', 500)
+
+    @http.route('/api/easy_apps/exams/auth/refresh', type='json', auth='public', methods=['POST'], csrf=False, cors="*")
+    def refresh(self, **kwargs):
+        """
+        Exchange a refresh token for a new access token and a new refresh token.
+        """
+        try:
+            refresh_token = kwargs.get('refresh_token')
+            if not refresh_token:
+                return _error_response("Missing refresh token", 400)
+
+            user, new_refresh_token = request.env['easy_exams.refresh_token'].sudo()._rotate(refresh_token)
+            if not user:
+                return _error_response("Invalid or expired refresh token", 401)
+
+            token = JWTAuth.generate_token(user)
+
+            return _success_response({
+                'token': token,
+                'refresh_token': new_refresh_token,
+                'expires_in': int(ACCESS_TOKEN_LIFETIME.total_seconds()),
+                'user_id': user.id,
+                'login': user.login
+            })
+        except Exception as e:
+            _logger.error(str(e))
+            return _error_response('Internal server error', 500)
+
+    @http.route('/api/easy_apps/exams/auth/revoke', type='json', auth='public', methods=['POST'], csrf=False, cors="*")
+    def revoke(self, **kwargs):
+        """
+        Revoke a refresh token, or every refresh token of its user when 'all' is set.
+        """
+        try:
+            refresh_token = kwargs.get('refresh_token')
+            if not refresh_token:
+                return _error_response("Missing refresh token", 400)
+
+            tokens = request.env['easy_exams.refresh_token'].sudo()
+            token = tokens._find(refresh_token)
+            if not token:
+                return _error_response("Invalid refresh token", 401)
+
+            if kwargs.get('all'):
+                tokens._revoke_user(token.user_id)
+            else:
+                token.write({'revoked': True})
+
+            return _success_response({}, "Refresh token revoked")
+        except Exception as e:
+            _logger.error(str(e))
+            return _error_response('Internal server error', 500)
@@ -3,7 +3,8 @@ from odoo import http
 from odoo.http import request
 from odoo.exceptions import AccessDenied
 from .auth import JWTAuth
-from ._helpers import _http_success_response, _http_error_response, _generate_code, _error_response, _success_response
+from ._sessions import AttemptSessions
+from ._helpers import _http_success_response, _http_error_response, _generate_code, _generate_unique_code, _error_response, _success_response, _managed_course_ids, _forget_access_code
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -20,7 +21,7 @@ class CoursesAPI(http.Controller):
             user_id = user_data.get("user_id")
 
             # Get courses where the user is enrolled
-            courses = request.env['easy_exams.course'].sudo().search([('user_ids', 'in', [user_id])])
+            courses = request.env['easy_exams.course'].sudo().search([('id', 'in', list(_managed_course_ids(user_id)))])
 
             course_data = [{
                 'id': course.id,
@@ -28,6 +29,7 @@ class CoursesAPI(http.Controller):
                 'description': course.description,
                 'code': course.code,
                 'access_key': course.access_key,
+                'retention_days': course.retention_days,
             } for course in courses]
 
             return _http_success_response(course_data, "Courses retrieved successfully.")
@@ -53,8 +55,12 @@ class CoursesAPI(http.Controller):
             if not name:
                 return _error_response('Course name is required', 400)
 
+            retention_days = kwargs.get('retention_days', 0)
+            if isinstance(retention_days, bool) or not isinstance(retention_days, int) or retention_days < 0:
+                return _error_response('retention_days must be a number of days, 0 to keep the attempts', 400)
+
             # Generate unique code and access key
-            code = _generate_code(6)
+            code = _generate_unique_code('easy_exams.course', 'code', 6)
             access_key = _generate_code(8)  # Could be hashed later
 
             # Create the course
@@ -63,6 +69,7 @@ class CoursesAPI(http.Controller):
                 'description': kwargs.get('description', ''),
                 'code': code,
                 'access_key': access_key,  # Not encrypted for now
+                'retention_days': retention_days,
                 'user_ids': [(4, user_id)],  # Assign first user
             })
 
@@ -91,16 +98,21 @@ class CoursesAPI(http.Controller):
             # Find the course
             course = request.env['easy_exams.course'].sudo().search([
                 ('id', '=', course_id),
-                ('user_ids', 'in', [user_id])  # Ensure user has access
+                ('id', 'in', list(_managed_course_ids(user_id)))  # Ensure user has access
             ], limit=1)
 
             if not course:
                 return _error_response("Course not found or access denied", 400)
 
+            retention_days = kwargs.get('retention_days', course.retention_days)
+            if isinstance(retention_days, bool) or not isinstance(retention_days, int) or retention_days < 0:
+                return _error_response('retention_days must be a number of days, 0 to keep the attempts', 400)
+
             # Update fields if provided
             course.write({
                 'name': kwargs.get('name', course.name),
                 'description': kwargs.get('description', course.description),
+                'retention_days': retention_days,
             })
 
             # Prepare response
@@ -110,6 +122,7 @@ class CoursesAPI(http.Controller):
                 'description': course.description,
                 'code': course.code,
                 'access_key': course.access_key,
+                'retention_days': course.retention_days,
             }
 
             return _success_response(updated_course, "Course updated successfully.")
@@ -148,7 +161,7 @@ class CoursesAPI(http.Controller):
                 return _error_response('Invalid Access Key', 403)
 
             # Add the user to the course
-            if user_id not in course.user_ids.ids :
+            if course.id not in _managed_course_ids(user_id):
                 course.write({'user_ids': [(4, user_id)]})
 
             # Prepare response
@@ -158,6 +171,7 @@ class CoursesAPI(http.Controller):
                 'description': course.description,
                 'code': course.code,
                 'access_key': course.access_key,
+                'retention_days': course.retention_days,
             }
 
             return _success_response(updated_course, "Course updated successfully.")
@@ -173,7 +187,8 @@ class CoursesAPI(http.Controller):
     @http.route('/api/exams/courses/delete/<int:course_id>', type='http', auth='public', methods=['DELETE'], csrf=False, cors="*")
     def delete_exam_course(self, course_id, **kwargs):
         """
-        Deletes a course if the user has access.
+        Deletes a course if the user has access. The course and its exams are hidden at once,
+        their data is deleted in batches by the retention cron.
         """
         try:
             user_data = JWTAuth.authenticate_request()  # Validate JWT
@@ -182,14 +197,17 @@ class CoursesAPI(http.Controller):
             # Find the course
             course = request.env['easy_exams.course'].sudo().search([
                 ('id', '=', course_id),
-                ('user_ids', 'in', [user_id])  # Ensure user has access
+                ('id', 'in', list(_managed_course_ids(user_id)))  # Ensure user has access
             ], limit=1)
 
             if not course:
                 return _http_error_response("Course not found or access denied", 400)
 
-            # Delete course
-            course.unlink()
+            # Soft delete, the exams stop accepting attempts right away
+            for access_code in course.exam_ids.mapped('access_code'):
+                _forget_access_code(access_code)
+            for attempt_id in course._soft_delete().ids:
+                AttemptSessions.finish(attempt_id)
 
             return _http_success_response({}, "Course deleted successfully.")
 
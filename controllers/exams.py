@@ -3,7 +3,9 @@ from odoo import http
 from odoo.http import request
 from odoo.exceptions import AccessDenied, ValidationError
 from .auth import JWTAuth
-from ._helpers import _http_success_response, _http_error_response, _error_response, _success_response, _generate_code
+from ._delivery import warm_exam_caches
+from ._sessions import AttemptSessions
+from ._helpers import _http_success_response, _http_error_response, _error_response, _success_response, _generate_unique_code, _managed_course_ids, _sync_child_rows, _remember_access_code, _forget_access_code
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -24,7 +26,7 @@ class ExamAPI(http.Controller):
             if not course_id:
                 return _http_error_response('Course id is required')
             
-            domain = [('course_id.user_ids', 'in', user_id), ('course_id', '=', int(course_id))]
+            domain = [('course_id', 'in', list(_managed_course_ids(user_id))), ('course_id', '=', int(course_id))]
 
             exams = request.env['easy_exams.exam'].sudo().search(domain)
 
@@ -63,11 +65,11 @@ class ExamAPI(http.Controller):
             if not name or not course_id:
                 return _error_response('Missing required fields', 400)
 
-            access_code = _generate_code(6)
+            access_code = _generate_unique_code('easy_exams.exam', 'access_code', 6)
 
             # Validate course ownership
-            course = request.env['easy_exams.course'].sudo().search([('id', '=', course_id), ('user_ids', 'in', user_id)], limit=1)
-            if not course:
+            course = request.env['easy_exams.course'].sudo().browse(int(course_id))
+            if course.id not in _managed_course_ids(user_id):
                 return _error_response("Unauthorized: You don't have access to this course", 403)
 
             new_exam = request.env['easy_exams.exam'].sudo().create({
@@ -100,7 +102,7 @@ class ExamAPI(http.Controller):
             exam_id = kwargs.get('exam_id')
             if not exam_id:
                 return _error_response('Exam id is required', 400)
-            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id.user_ids', 'in', user_id)], limit=1)
+            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id', 'in', list(_managed_course_ids(user_id)))], limit=1)
             if not exam:
                 return _error_response("Exam not found or unauthorized", 400)
 
@@ -110,7 +112,10 @@ class ExamAPI(http.Controller):
                 'duration': kwargs.get('duration', exam.duration),
                 'is_active': kwargs.get('is_active', exam.is_active),
             }
+            was_active = exam.is_active
             exam.sudo().write(update_data)
+            if exam.is_active and not was_active:
+                warm_exam_caches(exam)
 
             return _success_response({'id': exam.id, 'name': exam.name}, "Exam updated successfully")
         except ValidationError as e:
@@ -121,6 +126,55 @@ class ExamAPI(http.Controller):
             _logger.error(f"Error updating exam: {str(e)}")
             return _error_response(f"Error updating exam: {str(e)}", 500)
 
+    ## 🔹 [PUT] Replace the Question Pools of an Exam
+    @http.route('/api/exams/pools/set', type='json', auth='public', methods=['PUT'], csrf=False, cors="*")
+    def set_exam_pools(self, **kwargs):
+        """
+        Replace the question pools of an exam with the given ordered list (JWT required).
+        Each attempt draws 'draw_count' questions of every pool, filtered by 'question_type' and/or 'tag'.
+        An empty list removes the pools: every question of the exam is asked.
+        """
+        try:
+            user_data = JWTAuth.authenticate_request()
+            user_id = user_data.get("user_id")
+
+            exam_id = kwargs.get('exam_id')
+            pools = kwargs.get('pools')
+
+            if not exam_id or not isinstance(pools, list):
+                return _error_response("Missing required fields", 400)
+
+            question_types = dict(request.env['easy_exams.exam_pool']._fields['question_type'].selection)
+            for pool in pools:
+                if not isinstance(pool, dict) or not isinstance(pool.get('draw_count'), int) or pool['draw_count'] <= 0:
+                    return _error_response("Every pool needs a positive draw_count", 400)
+                if pool.get('question_type') and pool['question_type'] not in question_types:
+                    return _error_response("Invalid question_type", 400)
+                pool['question_type'] = pool.get('question_type') or False
+                pool['tag'] = pool.get('tag') or False
+
+            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id', 'in', list(_managed_course_ids(user_id)))], limit=1)
+            if not exam:
+                return _error_response("Exam not found or unauthorized", 400)
+
+            result = _sync_child_rows(exam.pool_ids, pools, ['question_type', 'tag', 'draw_count'], {'exam_id': exam.id})
+
+            pool_data = [{
+                'id': pool.id,
+                'question_type': pool.question_type,
+                'tag': pool.tag,
+                'draw_count': pool.draw_count,
+            } for pool in result]
+
+            return _success_response(pool_data, "Pools updated successfully")
+        except ValidationError as e:
+            return _error_response(str(e), 400)
+        except AccessDenied:
+            return _error_response('Unauthorized: Access Denied', 401)
+        except Exception as e:
+            _logger.error(f"Error setting pools: {str(e)}")
+            return _error_response(f"Error setting pools: {str(e)}", 500)
+
     ## 🔹 [PUT] Update an Exam
     @http.route('/api/exams/update_code', type='json', auth='public', methods=['PUT'], csrf=False, cors="*")
     def update_exam_code(self, **kwargs):
@@ -135,14 +189,18 @@ class ExamAPI(http.Controller):
             if not exam_id:
                 return _error_response('Exam id is required', 400)
 
-            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id.user_ids', 'in', user_id)], limit=1)
+            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id', 'in', list(_managed_course_ids(user_id)))], limit=1)
             if not exam:
                 return _error_response("Exam not found or unauthorized", 404)
-            access_code = _generate_code(6)
+            access_code = _generate_unique_code('easy_exams.exam', 'access_code', 6)
+            old_access_code = exam.access_code
             update_data = {
                 'access_code': access_code,
             }
             exam.sudo().write(update_data)
+            _forget_access_code(old_access_code)
+            if exam.is_active:
+                _remember_access_code(exam)
 
             return _success_response({'id': exam.id, 'name': exam.name, 'access_code': access_code}, "Exam updated successfully")
         except ValidationError as e:
@@ -167,7 +225,7 @@ class ExamAPI(http.Controller):
             if not exam_id:
                 return _error_response('Exam id is required', 400)
 
-            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id.user_ids', 'in', user_id)], limit=1)
+            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id', 'in', list(_managed_course_ids(user_id)))], limit=1)
             if not exam:
                 return _error_response("Exam not found or unauthorized", 404)
 
@@ -175,6 +233,10 @@ class ExamAPI(http.Controller):
                 'is_active': not exam.is_active,
             }
             exam.sudo().write(update_data)
+            if exam.is_active:
+                warm_exam_caches(exam)
+            else:
+                _forget_access_code(exam.access_code)
 
             return _success_response({'id': exam.id, 'name': exam.name, 'is_active': exam.is_active}, "Exam updated successfully")
         except ValidationError as e:
@@ -189,17 +251,20 @@ class ExamAPI(http.Controller):
     @http.route('/api/exams/delete/<int:exam_id>', type='http', auth='public', methods=['DELETE'], csrf=False, cors="*")
     def delete_exam(self, exam_id, **kwargs):
         """
-        Delete an exam (JWT required)
+        Delete an exam (JWT required). The exam is hidden and closed at once, its data is
+        deleted in batches by the retention cron.
         """
         try:
             user_data = JWTAuth.authenticate_request()
             user_id = user_data.get("user_id")
 
-            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id.user_ids', 'in', user_id)], limit=1)
+            exam = request.env['easy_exams.exam'].sudo().search([('id', '=', exam_id), ('course_id', 'in', list(_managed_course_ids(user_id)))], limit=1)
             if not exam:
                 return _http_error_response("Exam not found or unauthorized", 404)
 
-            exam.sudo().unlink()
+            _forget_access_code(exam.access_code)
+            for attempt_id in exam._soft_delete().ids:
+                AttemptSessions.finish(attempt_id)
 
             return _http_success_response({'id': exam_id}, "Exam deleted successfully")
         except AccessDenied:
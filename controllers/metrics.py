@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import hmac
+from odoo import http
+from odoo.http import request, Response
+from ..tools.metrics import metrics
+import logging
+
+_logger = logging.getLogger(__name__)
+
+METRICS_TOKEN_PARAM = 'easy_exams_metrics_token'
+
+class MetricsAPI(http.Controller):
+
+    ## 🔹 [GET] Prometheus Metrics
+    @http.route('/api/exams/metrics', type='http', auth='public', methods=['GET'], csrf=False)
+    def get_metrics(self, token=None, **kwargs):
+        """
+        Per route timing, SQL, LLM and response size metrics of this worker, in the Prometheus
+        text format. Disabled unless the easy_exams_metrics_token system parameter is set, the
+        token is sent as 'Authorization: Bearer <token>' or the token parameter.
+        """
+        try:
+            expected = request.env['ir.config_parameter'].sudo().get_param(METRICS_TOKEN_PARAM)
+            if not expected:
+                return Response("Not Found", status=404)
+
+            header = request.httprequest.headers.get('Authorization', '')
+            if header.startswith('Bearer '):
+                token = header[len('Bearer '):]
+            if not token or not hmac.compare_digest(token.encode(), expected.encode()):
+                return Response("Unauthorized", status=401)
+
+            return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+        except Exception as e:
+            _logger.error(f"Error rendering metrics: {str(e)}")
+            return Response("Error rendering metrics", status=500)
@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
 from odoo import http
 from odoo.http import request
-from odoo.exceptions import AccessDenied
+from odoo.exceptions import AccessDenied, ValidationError
 from .auth import JWTAuth
-from ._helpers import _http_success_response, _http_error_response, _error_response, _success_response
+from ._helpers import _http_success_response, _http_error_response, _error_response, _success_response, _sync_child_rows, _managed_course_ids
 
 import logging
 
@@ -19,7 +19,7 @@ class QuestionOptionAPI(http.Controller):
             user_id = user_data.get("user_id")
 
             question = request.env['easy_exams.question'].sudo().browse(question_id)
-            if not question.exists() or user_id not in question.exam_id.course_id.user_ids.ids:
+            if not question.exists() or question.exam_id.course_id.id not in _managed_course_ids(user_id):
                 return _http_error_response("Unauthorized: Access Denied", 403)
 
             options = request.env['easy_exams.question_option'].sudo().search([('question_id', '=', question_id)])
@@ -52,7 +52,7 @@ class QuestionOptionAPI(http.Controller):
                 return _error_response("Missing required fields", 400)
 
             question = request.env['easy_exams.question'].sudo().browse(question_id)
-            if not question.exists() or user_id not in question.exam_id.course_id.user_ids.ids:
+            if not question.exists() or question.exam_id.course_id.id not in _managed_course_ids(user_id):
                 return _error_response("Unauthorized: Access Denied", 403)
 
             option = request.env['easy_exams.question_option'].sudo().create({
@@ -84,7 +84,7 @@ class QuestionOptionAPI(http.Controller):
 
             option = request.env['easy_exams.question_option'].sudo().browse(option_id)
 
-            if not option.exists() or not option.question_id or not option.question_id.exam_id or not option.question_id.exam_id.course_id or user_id not in option.question_id.exam_id.course_id.user_ids.ids:
+            if not option.exists() or not option.question_id or not option.question_id.exam_id or not option.question_id.exam_id.course_id or option.question_id.exam_id.course_id.id not in _managed_course_ids(user_id):
                 return _error_response("Unauthorized: Access Denied", 403)
 
             option.write({
@@ -100,6 +100,52 @@ class QuestionOptionAPI(http.Controller):
             _logger.error(f"Error updating option: {str(e)}")
             return _error_response(f"Error updating option: {str(e)}", 500)
     
+    ## 🔹 [PUT] Replace all Options of a Question
+    @http.route('/api/exams/questions/options/set', type='json', auth='public', methods=['PUT'], csrf=False, cors="*")
+    def set_question_options(self, **kwargs):
+        """
+        Replace the options of a question with the given ordered list (JWT required).
+        Options with an id are updated, options without id are created and the missing ones are deleted.
+        """
+        try:
+            user_data = JWTAuth.authenticate_request()
+            user_id = user_data.get("user_id")
+
+            question_id = kwargs.get('question_id')
+            options = kwargs.get('options')
+
+            if not question_id or not isinstance(options, list):
+                return _error_response("Missing required fields", 400)
+
+            if any(not isinstance(opt, dict) or not opt.get('content') for opt in options):
+                return _error_response("Every option needs a content", 400)
+
+            question = request.env['easy_exams.question'].sudo().search([
+                ('id', '=', question_id),
+                ('exam_id.course_id', 'in', list(_managed_course_ids(user_id)))
+            ], limit=1)
+            if not question:
+                return _error_response("Unauthorized: Access Denied", 403)
+
+            for opt in options:
+                opt['is_correct'] = bool(opt.get('is_correct', False))
+
+            result = _sync_child_rows(question.option_ids, options, ['content', 'is_correct'], {'question_id': question.id})
+
+            option_data = [
+                {'id': opt.id,
+                 'content': opt.content,
+                 'is_correct': opt.is_correct} for opt in result]
+
+            return _success_response(option_data, "Options updated successfully")
+        except ValidationError as e:
+            return _error_response(str(e), 400)
+        except AccessDenied:
+            return _error_response("Unauthorized: Access Denied", 401)
+        except Exception as e:
+            _logger.error(f"Error setting options: {str(e)}")
+            return _error_response(f"Error setting options: {str(e)}", 500)
+
     ## 🔹 [DELETE] Delete an Option
     @http.route('/api/exams/questions/options/delete/<int:option_id>', type='http', auth='public', methods=['DELETE'], csrf=False, cors="*")
     def delete_question_option(self, option_id, **kwargs):
@@ -109,7 +155,7 @@ class QuestionOptionAPI(http.Controller):
             user_id = user_data.get("user_id")
 
             option = request.env['easy_exams.question_option'].sudo().browse(option_id)
-            if not option.exists() or user_id not in option.question_id.exam_id.course_id.user_ids.ids:
+            if not option.exists() or option.question_id.exam_id.course_id.id not in _managed_course_ids(user_id):
                 return _http_error_response("Unauthorized: Access Denied", 403)
 
             option.unlink()
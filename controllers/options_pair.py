@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
 from odoo import http
 from odoo.http import request
-from odoo.exceptions import AccessDenied
+from odoo.exceptions import AccessDenied, ValidationError
 from .auth import JWTAuth
-from ._helpers import _http_success_response, _http_error_response, _error_response, _success_response
+from ._helpers import _http_success_response, _http_error_response, _error_response, _success_response, _sync_child_rows, _managed_course_ids
 
 import logging
 
@@ -20,7 +20,7 @@ class QuestionPairAPI(http.Controller):
             user_id = user_data.get("user_id")
 
             question = request.env['easy_exams.question'].sudo().browse(question_id)
-            if not question.exists() or user_id not in question.exam_id.course_id.user_ids.ids:
+            if not question.exists() or question.exam_id.course_id.id not in _managed_course_ids(user_id):
                 return _http_error_response("Unauthorized: Access Denied", 403)
 
             pairs = request.env['easy_exams.question_pair'].sudo().search([('question_id', '=', question_id)])
@@ -50,7 +50,7 @@ class QuestionPairAPI(http.Controller):
                 return _error_response("Missing required fields", 400)
 
             question = request.env['easy_exams.question'].sudo().browse(question_id)
-            if not question.exists() or user_id not in question.exam_id.course_id.user_ids.ids:
+            if not question.exists() or question.exam_id.course_id.id not in _managed_course_ids(user_id):
                 return _error_response("Unauthorized: Access Denied", 403)
 
             pair = request.env['easy_exams.question_pair'].sudo().create({
@@ -81,10 +81,7 @@ class QuestionPairAPI(http.Controller):
 
             pair = request.env['easy_exams.question_pair'].sudo().browse(pair_id)
 
-            print('pair.question_id.exam_id.course_id.user_ids' *2)
-            print(pair.question_id.exam_id.course_id.user_ids)
-
-            if not pair.exists() or not pair.question_id or not pair.question_id.exam_id or not pair.question_id.exam_id.course_id or user_id not in pair.question_id.exam_id.course_id.user_ids.ids:
+            if not pair.exists() or not pair.question_id or not pair.question_id.exam_id or not pair.question_id.exam_id.course_id or pair.question_id.exam_id.course_id.id not in _managed_course_ids(user_id):
                 return _error_response("Unauthorized: Access Denied", 403)
 
             pair.write({
@@ -100,6 +97,46 @@ class QuestionPairAPI(http.Controller):
             _logger.error(f"Error updating pair: {str(e)}")
             return _error_response(f"Error updating pair: {str(e)}", 500)
         
+    ## 🔹 [PUT] Replace all Pairs of a Question
+    @http.route('/api/exams/questions/pairs/set', type='json', auth='public', methods=['PUT'], csrf=False, cors="*")
+    def set_question_pairs(self, **kwargs):
+        """
+        Replace the pairs of a question with the given ordered list (JWT required).
+        Pairs with an id are updated, pairs without id are created and the missing ones are deleted.
+        """
+        try:
+            user_data = JWTAuth.authenticate_request()
+            user_id = user_data.get("user_id")
+
+            question_id = kwargs.get('question_id')
+            pairs = kwargs.get('pairs')
+
+            if not question_id or not isinstance(pairs, list):
+                return _error_response("Missing required fields", 400)
+
+            if any(not isinstance(pair, dict) or not pair.get('term') or not pair.get('match') for pair in pairs):
+                return _error_response("Every pair needs a term and a match", 400)
+
+            question = request.env['easy_exams.question'].sudo().search([
+                ('id', '=', question_id),
+                ('exam_id.course_id', 'in', list(_managed_course_ids(user_id)))
+            ], limit=1)
+            if not question:
+                return _error_response("Unauthorized: Access Denied", 403)
+
+            result = _sync_child_rows(question.pair_ids, pairs, ['term', 'match'], {'question_id': question.id})
+
+            pair_data = [{'id': pair.id, 'term': pair.term, 'match': pair.match} for pair in result]
+
+            return _success_response(pair_data, "Pairs updated successfully")
+        except ValidationError as e:
+            return _error_response(str(e), 400)
+        except AccessDenied:
+            return _error_response("Unauthorized: Access Denied", 401)
+        except Exception as e:
+            _logger.error(f"Error setting pairs: {str(e)}")
+            return _error_response(f"Error setting pairs: {str(e)}", 500)
+
     ## 🔹 [DELETE] Delete a Pair
     @http.route('/api/exams/questions/pairs/delete/<int:pair_id>', type='http', auth='public', methods=['DELETE'], csrf=False, cors="*")
     def delete_question_pair(self, pair_id, **kwargs):
@@ -109,7 +146,7 @@ class QuestionPairAPI(http.Controller):
             user_id = user_data.get("user_id")
 
             pair = request.env['easy_exams.question_pair'].sudo().browse(pair_id)
-            if not pair.exists() or user_id not in pair.question_id.exam_id.course_id.user_ids.ids:
+            if not pair.exists() or pair.question_id.exam_id.course_id.id not in _managed_course_ids(user_id):
                 return _http_error_response("Unauthorized: Access Denied", 403)
 
             pair.unlink()
@@ -3,14 +3,16 @@ from odoo import http
 from odoo.http import request
 from odoo.exceptions import AccessDenied, ValidationError
 from .auth import JWTAuth
-from ._helpers import _http_success_response, _http_error_response, _error_response, _success_response
+from ._delivery import get_delivery_payload, select_delivery_questions, shuffle_delivery_payload
+from ._helpers import _http_success_response, _http_error_response, _error_response, _success_response, _managed_course_ids
 import logging
 import base64
-import re
-import random
 
 _logger = logging.getLogger(__name__)
 
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
 class QuestionAPI(http.Controller):
 
     ## 🔹 [GET] Retrieve Questions by Exam ID
@@ -30,7 +32,7 @@ class QuestionAPI(http.Controller):
             # Check if user has access to the exam
             exam = request.env['easy_exams.exam'].sudo().search([
                 ('id', '=', exam_id),
-                ('course_id.user_ids', 'in', [user_id])
+                ('course_id', 'in', list(_managed_course_ids(user_id)))
             ], limit=1)
 
             if not exam:
@@ -56,6 +58,7 @@ class QuestionAPI(http.Controller):
                     'content': q.content,
                     'image': image,
                     'correct_answer': q.correct_answer,
+                    'tag': q.tag,
                     'options': [{'id': opt.id, 'content': opt.content, 'is_correct': opt.is_correct} for opt in q.option_ids],
                     'pairs': [{'id': pair.id, 'term': pair.term, 'match': pair.match} for pair in q.pair_ids]
                 })
@@ -68,6 +71,42 @@ class QuestionAPI(http.Controller):
             return _http_error_response(f"Error retrieving questions: {str(e)}", 500)
 
 
+    ## 🔹 [GET] Search the Question Bank
+    @http.route('/api/exams/questions/search', type='http', auth='public', methods=['GET'], csrf=False, cors="*")
+    def search_questions(self, q=None, question_type=None, page=1, limit=SEARCH_PAGE_SIZE, **kwargs):
+        """
+        Ranked full text search of the questions, options and pairs of the courses managed by the user (JWT required)
+        """
+        try:
+            user_data = JWTAuth.authenticate_request()
+            user_id = user_data.get("user_id")
+
+            if not q or not q.strip():
+                return _http_error_response("Missing q parameter", 400)
+            question_types = dict(request.env['easy_exams.question']._fields['question_type'].selection)
+            if question_type and question_type not in question_types:
+                return _http_error_response("Invalid question_type", 400)
+            try:
+                page = max(int(page), 1)
+                limit = min(max(int(limit), 1), SEARCH_MAX_PAGE_SIZE)
+            except ValueError:
+                return _http_error_response("page and limit must be integers", 400)
+
+            total, results = request.env['easy_exams.question'].sudo()._search_bank(
+                _managed_course_ids(user_id), q, question_type=question_type, limit=limit, offset=(page - 1) * limit,
+            )
+            return _http_success_response({
+                'total': total,
+                'page': page,
+                'limit': limit,
+                'results': results,
+            }, "Questions found successfully")
+        except AccessDenied as e:
+            return _http_error_response(str(e), 403)
+        except Exception as e:
+            _logger.error(f"Error searching questions: {str(e)}")
+            return _http_error_response(f"Error searching questions: {str(e)}", 500)
+
     ## 🔹 [GET] Retrieve Questions by Exam ID
     @http.route('/api/exams/raw_questions', type='http', auth='public', methods=['GET'], csrf=False, cors="*")
     def get_raw_questions(self, **kwargs):
@@ -86,55 +125,8 @@ class QuestionAPI(http.Controller):
             ], limit=1)
             if not exam:
                 return _http_error_response("Exam not found", 404)
-            # Fetch questions for the exam
-            questions = request.env['easy_exams.question'].sudo().search([('exam_id', '=', exam_id)])
-            question_data = []
-            for q in questions:
-                image = q.image.decode('utf-8') if q.image else None
-                if q.question_type == 'multiple_choice':
-                    options = [{'id': opt.id, 'content': opt.content} for opt in q.option_ids]
-                    random.shuffle(options)
-                    question_data.append({
-                        'id': q.id,
-                        'question_type': q.question_type,
-                        'content': q.content,
-                        'image': image,
-                        'options': options
-                    })
-                
-                if q.question_type == 'fill_in_the_blank': 
-                    regex = r'\{\{.*?\}\}'
-                    content = re.sub(regex, '{{}}', q.content)
-                    question_data.append({
-                    'id': q.id,
-                    'question_type': q.question_type,
-                    'content': content,
-                    'image': image,
-                })
-                if q.question_type == 'short_answer' or q.question_type == 'long_answer':
-                    question_data.append({
-                        'id': q.id,
-                        'question_type': q.question_type,
-                        'content': q.content,
-                        'image': image,
-                    })
-                if q.question_type == 'matching': # QAP modify the pairs
-                    pairs = []
-                    matches = []
-                    for pair in q.pair_ids:
-                        pairs.append({'id': pair.id, 'term': pair.term})
-                        matches.append(pair.match)
-                    random.shuffle(matches)
-                    question_data.append({
-                        'id': q.id,
-                        'question_type': q.question_type,
-                        'content': q.content,
-                        'image': image,
-                        'pairs': pairs,
-                        'matches' : matches
-                    })
-                    
-            random.shuffle(question_data)
+            attempt = request.env['easy_exams.exam_attempt'].sudo().browse(attempt_data['attempt_id'])
+            question_data = shuffle_delivery_payload(select_delivery_questions(get_delivery_payload(exam), attempt))
 
             return _http_success_response(question_data, "Questions (cleaned) retrieved successfully")
         except AccessDenied as e:
@@ -163,7 +155,7 @@ class QuestionAPI(http.Controller):
             # Check if user has access to the exam
             exam = request.env['easy_exams.exam'].sudo().search([
                 ('id', '=', exam_id),
-                ('course_id.user_ids', 'in', [user_id])
+                ('course_id', 'in', list(_managed_course_ids(user_id)))
             ], limit=1)
 
             if not exam:
@@ -180,6 +172,7 @@ class QuestionAPI(http.Controller):
                 'content': kwargs.get('content',''),
                 'image': kwargs.get('image') or False,
                 'correct_answer': correct_answer,
+                'tag': kwargs.get('tag') or False,
             })
 
             question_data = {
@@ -190,6 +183,7 @@ class QuestionAPI(http.Controller):
                 'content': new_question.content,
                 'image': new_question.image,
                 'correct_answer': new_question.correct_answer,
+                'tag': new_question.tag,
                 'options': [{'id': opt.id, 'content': opt.content, 'is_correct': opt.is_correct} for opt in new_question.option_ids],
                 'pairs': [{'id': pair.id, 'term': pair.term, 'match': pair.match} for pair in new_question.pair_ids]
             } 
@@ -220,7 +214,7 @@ class QuestionAPI(http.Controller):
             # Find the question
             question = request.env['easy_exams.question'].sudo().search([
                 ('id', '=', question_id),
-                ('exam_id.course_id.user_ids', 'in', [user_id])
+                ('exam_id.course_id', 'in', list(_managed_course_ids(user_id)))
             ], limit=1)
 
             if not question:
@@ -233,6 +227,7 @@ class QuestionAPI(http.Controller):
                 'content': kwargs.get('content', question.content),
                 'image': kwargs.get('image', question.image),
                 'correct_answer': kwargs.get('correct_answer', question.correct_answer),
+                'tag': kwargs.get('tag', question.tag),
             }
 
             # Check if the question_type has changed
@@ -269,7 +264,7 @@ class QuestionAPI(http.Controller):
             # Find the question
             question = request.env['easy_exams.question'].sudo().search([
                 ('id', '=', question_id),
-                ('exam_id.course_id.user_ids', 'in', [user_id])
+                ('exam_id.course_id', 'in', list(_managed_course_ids(user_id)))
             ], limit=1)
 
             if not question:
@@ -0,0 +1,35 @@
+import logging
+import random
+import string
+
+_logger = logging.getLogger(__name__)
+
+def _dedupe_codes(cr, table, column):
+    """
+    Give a fresh code to every row sharing its code with an older row,
+    so the unique constraint added by this version can be created.
+    """
+    cr.execute(f"""
+        SELECT id FROM (
+            SELECT id, row_number() OVER (PARTITION BY {column} ORDER BY id) AS position
+            FROM {table}
+        ) AS ranked
+        WHERE position > 1
+    """)
+    duplicate_ids = [row[0] for row in cr.fetchall()]
+    if not duplicate_ids:
+        return
+
+    cr.execute(f"SELECT {column} FROM {table}")
+    used_codes = {row[0] for row in cr.fetchall()}
+    for record_id in duplicate_ids:
+        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+        while code in used_codes:
+            code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+        used_codes.add(code)
+        cr.execute(f"UPDATE {table} SET {column} = %s WHERE id = %s", (code, record_id))
+    _logger.info("Regenerated %s duplicated codes in %s.%s", len(duplicate_ids), table, column)
+
+def migrate(cr, version):
+    _dedupe_codes(cr, 'easy_exams_exam', 'access_code')
+    _dedupe_codes(cr, 'easy_exams_course', 'code')
@@ -0,0 +1,21 @@
+import logging
+
+_logger = logging.getLogger(__name__)
+
+TABLES = [
+    'easy_exams_exam',
+    'easy_exams_question',
+    'easy_exams_question_option',
+    'easy_exams_question_pair',
+    'easy_exams_exam_attempt',
+    'easy_exams_question_answer',
+    'easy_exams_answer_option',
+    'easy_exams_question_answer_pair',
+]
+
+def migrate(cr, version):
+    # The new indexes are created by the module update, refresh the statistics so the
+    # planner starts using them right away instead of after the next autovacuum.
+    for table in TABLES:
+        cr.execute(f"ANALYZE {table}")
+    _logger.info("Analyzed %s easy_exams tables after adding indexes", len(TABLES))
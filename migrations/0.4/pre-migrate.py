@@ -0,0 +1,22 @@
+import logging
+
+_logger = logging.getLogger(__name__)
+
+def migrate(cr, version):
+    # Keep only the latest answer of each question in an attempt so the
+    # unique (attempt_id, question_id) constraint of this version can be created.
+    # Selected options and pairs of the removed answers go with them (ON DELETE CASCADE).
+    cr.execute("""
+        DELETE FROM easy_exams_question_answer
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (PARTITION BY attempt_id, question_id ORDER BY id DESC) AS position
+                FROM easy_exams_question_answer
+            ) AS ranked
+            WHERE position > 1
+        )
+    """)
+    _logger.info("Removed %s duplicated question answers", cr.rowcount)
+
+    # The unique constraint index replaces the plain composite index of 0.3.
+    cr.execute("DROP INDEX IF EXISTS easy_exams_question_answer_attempt_id_question_id_index")
@@ -0,0 +1,8 @@
+def migrate(cr, version):
+    # Attempts finished before this version keep their score as it is, only the
+    # ones never finished are closed and finalized by the cron.
+    cr.execute("""
+        UPDATE easy_exams_exam_attempt
+        SET is_finalized = true
+        WHERE end_time IS NOT NULL
+    """)
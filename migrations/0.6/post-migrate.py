@@ -0,0 +1,24 @@
+import logging
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+def migrate(cr, version):
+    # Long answers saved before this version have no signature yet, index them once.
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cr.execute("""
+        SELECT ans.id
+        FROM easy_exams_question_answer ans
+        JOIN easy_exams_question q ON q.id = ans.question_id
+        WHERE q.question_type = 'long_answer'
+        ORDER BY ans.id
+    """)
+    answer_ids = [row[0] for row in cr.fetchall()]
+    answers = env['easy_exams.question_answer']
+    signatures = env['easy_exams.answer_signature']
+    for start in range(0, len(answer_ids), BATCH_SIZE):
+        signatures._index_answers(answers.browse(answer_ids[start:start + BATCH_SIZE]))
+        env.invalidate_all()
+    _logger.info("Indexed %s long answers for near duplicate detection", len(answer_ids))
@@ -0,0 +1,14 @@
+import logging
+from odoo import api, SUPERUSER_ID
+
+_logger = logging.getLogger(__name__)
+
+def migrate(cr, version):
+    # The search_vector column is created empty by the module update, fill it for the
+    # existing questions. New or edited questions keep it up to date themselves.
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cr.execute("SELECT id FROM easy_exams_question WHERE search_vector IS NULL")
+    questions = env['easy_exams.question'].browse([row[0] for row in cr.fetchall()])
+    questions._refresh_search_vector()
+    cr.execute("ANALYZE easy_exams_question")
+    _logger.info("Built the search document of %s questions", len(questions))
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+from . import exam_content
 from . import answers
 from . import attempts
 from . import courses
@@ -9,3 +10,15 @@ from . import questions
 from . import options_pair
 from . import answer_pair
 from . import answer_options
+from . import config_parameter
+from . import refresh_tokens
+from . import answer_drafts
+from . import attempt_events
+from . import item_analysis
+from . import reports
+from . import answer_similarity
+from . import exam_pools
+from . import ir_http
+from . import attempt_archive
+from . import retention
+from . import res_users
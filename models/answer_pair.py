@@ -4,19 +4,22 @@ class QuestionAnswerPair(models.Model):
     _name = 'easy_exams.question_answer_pair'
     _description = 'Question Answer Pair'
 
-    answer_id = fields.Many2one('easy_exams.question_answer', string="Question Answer", required=True, ondelete='cascade')
-    question_pair_id = fields.Many2one('easy_exams.question_pair', string="Question Pair", required=True, ondelete='cascade')
+    answer_id = fields.Many2one('easy_exams.question_answer', string="Question Answer", required=True, index=True, ondelete='cascade')
+    question_pair_id = fields.Many2one('easy_exams.question_pair', string="Question Pair", required=True, index=True, ondelete='cascade')
     selected_match = fields.Char(string="Selected Match", required=True)
 
     @api.model_create_multi
     def create(self, vals_list):
         records = super(QuestionAnswerPair, self).create(vals_list)
-        for record in records:
-            self._qualify_answer(record)
+        if not self.env.context.get('skip_grading'):
+            for record in records:
+                self._qualify_answer(record)
         return records
     
     def write(self, vals):
-        if not self.env.context.get('qualifying'): 
+        if self.env.context.get('skip_grading'):
+            result = super(QuestionAnswerPair, self).write(vals)
+        elif not self.env.context.get('qualifying'): 
             self = self.with_context(qualifying=True)  
             result = super(QuestionAnswerPair, self).write(vals)
             for record in self:
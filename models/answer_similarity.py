@@ -0,0 +1,124 @@
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+from psycopg2 import Binary
+from ..tools import minhash
+from ..tools.minhash import DEFAULT_THRESHOLD
+
+class AnswerSignature(models.Model):
+    _name = 'easy_exams.answer_signature'
+    _description = 'Long Answer MinHash Signature'
+
+    answer_id = fields.Many2one('easy_exams.question_answer', string="Answer", required=True, ondelete='cascade')
+    question_id = fields.Many2one('easy_exams.question', string="Question", required=True, index=True, ondelete='cascade')
+    # Packed little endian uint32 values, written and read with SQL only.
+    signature = fields.Binary(string="Signature", attachment=False)
+
+    _sql_constraints = [
+        ('answer_unique', 'unique(answer_id)', 'Only one signature per answer.'),
+    ]
+
+    @api.model
+    def _index_answers(self, answers):
+        """
+        (Re)compute the MinHash signature and LSH band buckets of the long answers among answers.
+        Answers with no words are removed from the index.
+        """
+        answers = answers.filtered(lambda answer: answer.question_id.question_type == 'long_answer')
+        if not answers:
+            return
+        self.env.cr.execute("DELETE FROM easy_exams_answer_lsh_bucket WHERE answer_id IN %s", (tuple(answers.ids),))
+
+        signatures, buckets, empty = [], [], []
+        for answer in answers:
+            sig = minhash.signature(answer.answer_text)
+            if sig is None:
+                empty.append(answer.id)
+                continue
+            signatures.append((answer.id, answer.question_id.id, Binary(minhash.to_bytes(sig))))
+            buckets.extend(
+                (answer.question_id.id, band, bucket, answer.id)
+                for band, bucket in enumerate(minhash.band_buckets(sig))
+            )
+
+        if empty:
+            self.env.cr.execute("DELETE FROM easy_exams_answer_signature WHERE answer_id IN %s", (tuple(empty),))
+        if signatures:
+            answer_ids, question_ids, blobs = zip(*signatures)
+            self.env.cr.execute("""
+                INSERT INTO easy_exams_answer_signature (answer_id, question_id, signature, create_date, write_date)
+                SELECT answer_id, question_id, signature, now() at time zone 'UTC', now() at time zone 'UTC'
+                FROM unnest(%s::int[], %s::int[], %s::bytea[]) AS s(answer_id, question_id, signature)
+                ON CONFLICT (answer_id)
+                DO UPDATE SET signature = EXCLUDED.signature, write_date = EXCLUDED.write_date
+            """, (list(answer_ids), list(question_ids), list(blobs)))
+            self.env.cr.execute("""
+                INSERT INTO easy_exams_answer_lsh_bucket (question_id, band, bucket, answer_id)
+                SELECT * FROM unnest(%s::int[], %s::int[], %s::int[], %s::int[])
+            """, [list(column) for column in zip(*buckets)])
+
+    @api.model
+    def _near_duplicates(self, exam_id, threshold=DEFAULT_THRESHOLD):
+        """
+        Pairs of long answers of the exam with an estimated similarity of at least threshold.
+        Candidates are the answers sharing an LSH bucket of the same question, only their
+        signatures are compared, never all the answers of a question pairwise.
+        Non-archived attempts only: the signatures go with the answers when an attempt is archived.
+        """
+        self.env.cr.execute("""
+            SELECT DISTINCT b1.answer_id, b2.answer_id
+            FROM easy_exams_answer_lsh_bucket b1
+            JOIN easy_exams_answer_lsh_bucket b2
+                ON b2.question_id = b1.question_id AND b2.band = b1.band
+                AND b2.bucket = b1.bucket AND b2.answer_id > b1.answer_id
+            JOIN easy_exams_question q ON q.id = b1.question_id
+            WHERE q.exam_id = %s
+        """, (exam_id,))
+        candidates = self.env.cr.fetchall()
+        if not candidates:
+            return []
+
+        answer_ids = tuple({answer_id for pair in candidates for answer_id in pair})
+        self.env.cr.execute("""
+            SELECT s.answer_id, s.signature, ans.question_id, a.id, a.student_id, a.student_name
+            FROM easy_exams_answer_signature s
+            JOIN easy_exams_question_answer ans ON ans.id = s.answer_id
+            JOIN easy_exams_exam_attempt a ON a.id = ans.attempt_id
+            WHERE s.answer_id IN %s
+        """, (answer_ids,))
+        rows = {row[0]: row for row in self.env.cr.fetchall()}
+
+        duplicates = []
+        for first_id, second_id in candidates:
+            first, second = rows.get(first_id), rows.get(second_id)
+            if not first or not second:
+                continue
+            score = minhash.similarity(minhash.from_bytes(first[1]), minhash.from_bytes(second[1]))
+            if score < threshold:
+                continue
+            duplicates.append({
+                'question_id': first[2],
+                'similarity': round(score, 4),
+                'answers': [{
+                    'answer_id': answer_id,
+                    'attempt_id': attempt_id,
+                    'student_id': student_id,
+                    'student_name': student_name,
+                } for answer_id, _signature, _question_id, attempt_id, student_id, student_name in (first, second)],
+            })
+        duplicates.sort(key=lambda duplicate: (duplicate['question_id'], -duplicate['similarity']))
+        return duplicates
+
+
+class AnswerLshBucket(models.Model):
+    _name = 'easy_exams.answer_lsh_bucket'
+    _description = 'Long Answer LSH Bucket'
+    _log_access = False
+
+    question_id = fields.Many2one('easy_exams.question', string="Question", required=True, ondelete='cascade')
+    band = fields.Integer(string="Band", required=True)
+    bucket = fields.Integer(string="Bucket", required=True)
+    answer_id = fields.Many2one('easy_exams.question_answer', string="Answer", required=True, index=True, ondelete='cascade')
+
+    def init(self):
+        # Candidate pairs are the answers of a question in the same (band, bucket).
+        create_index(self._cr, 'easy_exams_answer_lsh_bucket_question_band_bucket_index', self._table, ['question_id', 'band', 'bucket'])
@@ -0,0 +1,176 @@
+from odoo import models, fields, api
+from psycopg2 import Binary
+import collections
+import json
+import logging
+import zlib
+
+_logger = logging.getLogger(__name__)
+
+# Attempts are archived once their exam is closed and they ended this many days ago.
+ARCHIVE_AFTER_DAYS_PARAM = 'easy_exams_archive_after_days'
+DEFAULT_ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_FORMAT_VERSION = 1
+
+ANSWER_COLUMNS = ('id', 'question_id', 'answer_text', 'is_correct', 'q_score')
+OPTION_COLUMNS = ('id', 'answer_id', 'option_id')
+PAIR_COLUMNS = ('id', 'answer_id', 'question_pair_id', 'selected_match')
+
+def _columns(rows, names):
+    """Rows to a dict of columns, which compresses better than a list of objects"""
+    columns = {name: [] for name in names}
+    for row in rows:
+        for name, value in zip(names, row):
+            columns[name].append(value)
+    return columns
+
+def _rows(columns, names):
+    return list(zip(*(columns[name] for name in names)))
+
+class AttemptArchive(models.Model):
+    _name = 'easy_exams.attempt_archive'
+    _description = 'Archived Exam Attempt Answers'
+
+    attempt_id = fields.Many2one('easy_exams.exam_attempt', string="Exam Attempt", required=True, ondelete='cascade')
+    exam_id = fields.Many2one('easy_exams.exam', string="Exam", required=True, index=True, ondelete='cascade')
+    answer_count = fields.Integer(string="Answers")
+    # zlib compressed JSON of the answers, selected options and pairs, in columns.
+    # Written and read with SQL only.
+    data = fields.Binary(string="Data", attachment=False)
+
+    _sql_constraints = [
+        ('attempt_unique', 'unique(attempt_id)', 'An attempt is archived only once.'),
+    ]
+
+    @api.model
+    def _archive_attempts(self, attempt_ids):
+        """
+        Move the answers, selected options and pairs of the attempts to one compressed row per
+        attempt and delete the normalized rows, child tables first.
+        """
+        if not attempt_ids:
+            return
+        attempt_ids = tuple(attempt_ids)
+        for model in ('easy_exams.question_answer', 'easy_exams.answer_option', 'easy_exams.question_answer_pair'):
+            self.env[model].flush_model()
+        cr = self.env.cr
+        cr.execute(f"""
+            SELECT attempt_id, {', '.join(ANSWER_COLUMNS)}
+            FROM easy_exams_question_answer WHERE attempt_id IN %s ORDER BY id
+        """, (attempt_ids,))
+        answers = {}
+        answer_attempt = {}
+        for attempt_id, *row in cr.fetchall():
+            answers.setdefault(attempt_id, []).append(row)
+            answer_attempt[row[0]] = attempt_id
+
+        options, pairs = {}, {}
+        if answer_attempt:
+            answer_ids = tuple(answer_attempt)
+            cr.execute("""
+                SELECT id, answer_id, question_option FROM easy_exams_answer_option
+                WHERE answer_id IN %s ORDER BY id
+            """, (answer_ids,))
+            for row in cr.fetchall():
+                options.setdefault(answer_attempt[row[1]], []).append(row)
+            cr.execute("""
+                SELECT id, answer_id, question_pair_id, selected_match FROM easy_exams_question_answer_pair
+                WHERE answer_id IN %s ORDER BY id
+            """, (answer_ids,))
+            for row in cr.fetchall():
+                pairs.setdefault(answer_attempt[row[1]], []).append(row)
+
+        cr.execute("SELECT id, exam_id FROM easy_exams_exam_attempt WHERE id IN %s", (attempt_ids,))
+        for attempt_id, exam_id in cr.fetchall():
+            payload = {
+                'version': ARCHIVE_FORMAT_VERSION,
+                'answers': _columns(answers.get(attempt_id, []), ANSWER_COLUMNS),
+                'options': _columns(options.get(attempt_id, []), OPTION_COLUMNS),
+                'pairs': _columns(pairs.get(attempt_id, []), PAIR_COLUMNS),
+            }
+            data = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'), 9)
+            cr.execute("""
+                INSERT INTO easy_exams_attempt_archive (attempt_id, exam_id, answer_count, data, create_date, write_date)
+                VALUES (%s, %s, %s, %s, now() at time zone 'UTC', now() at time zone 'UTC')
+                ON CONFLICT (attempt_id) DO UPDATE SET data = EXCLUDED.data, answer_count = EXCLUDED.answer_count
+            """, (attempt_id, exam_id, len(answers.get(attempt_id, [])), Binary(data)))
+
+        if answer_attempt:
+            answer_ids = tuple(answer_attempt)
+            cr.execute("DELETE FROM easy_exams_answer_option WHERE answer_id IN %s", (answer_ids,))
+            cr.execute("DELETE FROM easy_exams_question_answer_pair WHERE answer_id IN %s", (answer_ids,))
+            cr.execute("DELETE FROM easy_exams_question_answer WHERE id IN %s", (answer_ids,))
+        cr.execute("UPDATE easy_exams_exam_attempt SET is_archived = true WHERE id IN %s", (attempt_ids,))
+        self.env.invalidate_all()
+
+    @api.model
+    def _load(self, attempt_ids):
+        """
+        Answers of archived attempts, in the same shape as easy_exams.exam_attempt._get_answer_rows.
+        :return: dict attempt id -> list of answer dicts
+        """
+        if not attempt_ids:
+            return {}
+        self.env.cr.execute("SELECT attempt_id, data FROM easy_exams_attempt_archive WHERE attempt_id IN %s", (tuple(attempt_ids),))
+        result = {}
+        for attempt_id, data in self.env.cr.fetchall():
+            payload = json.loads(zlib.decompress(bytes(data)))
+            selected = {}
+            for option_id, answer_id, question_option_id in _rows(payload['options'], OPTION_COLUMNS):
+                selected.setdefault(answer_id, []).append({'id': option_id, 'option_id': question_option_id})
+            paired = {}
+            for pair_id, answer_id, question_pair_id, selected_match in _rows(payload['pairs'], PAIR_COLUMNS):
+                paired.setdefault(answer_id, []).append({'id': pair_id, 'question_pair_id': question_pair_id, 'selected_match': selected_match})
+            # NULL columns read as the ORM reads them in _get_answer_rows.
+            result[attempt_id] = [{
+                'id': answer_id,
+                'question_id': question_id,
+                'answer_text': answer_text if answer_text is not None else False,
+                'is_correct': bool(is_correct),
+                'q_score': q_score or 0.0,
+                'selected_options': selected.get(answer_id, []),
+                'answer_pairs': paired.get(answer_id, []),
+            } for answer_id, question_id, answer_text, is_correct, q_score in _rows(payload['answers'], ANSWER_COLUMNS)]
+        return result
+
+    @api.model
+    def _load_exam_scores(self, exam_id):
+        """
+        Scores and selected options of the archived attempts of the exam, for the statistics.
+        :return: (list of (attempt id, question id, q_score), Counter option id -> selections)
+        """
+        self.env.cr.execute("SELECT attempt_id, data FROM easy_exams_attempt_archive WHERE exam_id = %s", (exam_id,))
+        scores, selections = [], collections.Counter()
+        for attempt_id, data in self.env.cr.fetchall():
+            payload = json.loads(zlib.decompress(bytes(data)))
+            answers = payload['answers']
+            scores.extend((attempt_id, question_id, q_score) for question_id, q_score in zip(answers['question_id'], answers['q_score']))
+            selections.update(payload['options']['option_id'])
+        return scores, selections
+
+    @api.model
+    def _cron_archive_attempts(self, batch_size=200):
+        """
+        Archive the finalized attempts of the inactive exams that ended more than
+        easy_exams_archive_after_days days ago, one committed batch at a time.
+        """
+        days = int(self.env['ir.config_parameter'].sudo().get_param(ARCHIVE_AFTER_DAYS_PARAM, DEFAULT_ARCHIVE_AFTER_DAYS))
+        while True:
+            self.env.cr.execute("""
+                SELECT a.id FROM easy_exams_exam_attempt a
+                JOIN easy_exams_exam e ON e.id = a.exam_id
+                WHERE a.is_archived IS NOT TRUE AND a.is_finalized
+                  AND e.is_active IS NOT TRUE
+                  AND a.end_time < (now() at time zone 'UTC') - %s * interval '1 day'
+                ORDER BY a.id
+                LIMIT %s
+                FOR UPDATE OF a SKIP LOCKED
+            """, (days, batch_size))
+            attempt_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not attempt_ids:
+                break
+            self._archive_attempts(attempt_ids)
+            self.env.cr.commit()
+            _logger.info("Archived %s exam attempts", len(attempt_ids))
+            if len(attempt_ids) < batch_size:
+                break
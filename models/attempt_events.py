@@ -0,0 +1,117 @@
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+
+from ..tools.event_listener import CHANNEL
+
+EVENT_TYPES = [
+    ('attempt_started', 'Attempt Started'),
+    ('question_answered', 'Question Answered'),
+    ('attempt_finished', 'Attempt Finished'),
+    ('answer_graded', 'Answer Graded'),
+]
+
+class AttemptEvent(models.Model):
+    _name = 'easy_exams.attempt_event'
+    _description = 'Attempt Event'
+    _order = 'id'
+
+    exam_id = fields.Many2one('easy_exams.exam', string="Exam", required=True, ondelete='cascade')
+    # Indexed for the deletes of attempts and questions (easy_exams.retention).
+    attempt_id = fields.Many2one('easy_exams.exam_attempt', string="Exam Attempt", index=True, ondelete='cascade')
+    question_id = fields.Many2one('easy_exams.question', string="Question", index=True, ondelete='cascade')
+    event_type = fields.Selection(EVENT_TYPES, string="Event Type", required=True)
+    score = fields.Float(string="Score")
+
+    def init(self):
+        # Ids come from a sequence and do not follow the commit order (an answer_graded
+        # transaction stays open during the grading call): the feeds resume from the id of the
+        # writing transaction instead, see _read_events. Not an ORM field, the column is filled
+        # by its default.
+        self._cr.execute(f"""
+            ALTER TABLE {self._table} ADD COLUMN IF NOT EXISTS txid bigint NOT NULL DEFAULT txid_current()
+        """)
+        create_index(self._cr, 'easy_exams_attempt_event_exam_id_txid_index', self._table, ['exam_id', 'txid'])
+
+    @api.model
+    def _log(self, event_type, attempt_ids, question_id=None, score=None):
+        """
+        Append an event per attempt to the change log with a single insert (no ORM create),
+        and notify the live feeds of the exams once the transaction commits.
+        """
+        if not attempt_ids:
+            return
+        self.env.cr.execute("""
+            WITH inserted AS (
+                INSERT INTO easy_exams_attempt_event (exam_id, attempt_id, question_id, event_type, score, create_date)
+                SELECT exam_id, id, %s, %s, %s, now() at time zone 'UTC'
+                FROM easy_exams_exam_attempt
+                WHERE id IN %s
+                RETURNING exam_id
+            )
+            SELECT pg_notify(%s, exam_id::text) FROM (SELECT DISTINCT exam_id FROM inserted) exams
+        """, (question_id, event_type, score, tuple(attempt_ids), CHANNEL))
+
+    @api.model
+    def _read_events(self, exam_id, cursor, limit=200):
+        """
+        Return the events of the exam written by the transactions from cursor on, in commit
+        order as far as it is known, and the cursor to resume from.
+        Every transaction older than the oldest one still running has ended: the cursor never
+        moves past it, so the events it writes when it commits are still read. The events of
+        the transactions committed since are read again on the next call: the delivery is at
+        least once, readers drop the ids they already received.
+        :return: (events, cursor)
+        """
+        cr = self.env.cr
+        # First statement of the transaction: the snapshot of the read below.
+        cr.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        oldest_running = cr.fetchone()[0]
+        # Whole transactions only: the page ends with the transaction of its limit-th event.
+        cr.execute("""
+            SELECT txid FROM easy_exams_attempt_event
+            WHERE exam_id = %s AND txid >= %s
+            ORDER BY txid OFFSET %s LIMIT 1
+        """, (exam_id, cursor, limit - 1))
+        row = cr.fetchone()
+        last_txid = row[0] if row else None
+        cr.execute("""
+            SELECT id, txid, event_type, attempt_id, question_id, score, create_date
+            FROM easy_exams_attempt_event
+            WHERE exam_id = %s AND txid >= %s AND (%s IS NULL OR txid <= %s)
+            ORDER BY txid, id
+        """, (exam_id, cursor, last_txid, last_txid))
+        rows = cr.fetchall()
+        if last_txid is not None:
+            # More may follow: resume after the last transaction read, all of its events are in.
+            next_cursor = min(last_txid + 1, oldest_running)
+        else:
+            next_cursor = oldest_running
+        events = [{
+            'id': event_id,
+            'type': event_type,
+            'attempt_id': attempt_id,
+            'question_id': question_id,
+            'score': score,
+            'time': create_date.isoformat() if create_date else None,
+        } for event_id, txid, event_type, attempt_id, question_id, score, create_date in rows]
+        return events, max(cursor, next_cursor)
+
+    @api.model
+    def _current_cursor(self):
+        """Cursor of a feed starting now: the events of the transactions still running are sent."""
+        self.env.cr.execute("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _log_version(self, exam_id):
+        """
+        Changes with every event committed for the exam: the count with the last id, since an
+        event committed late may have a lower id than the last one.
+        """
+        self.env.cr.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM easy_exams_attempt_event WHERE exam_id = %s", (exam_id,))
+        return self.env.cr.fetchone()
+
+    @api.autovacuum
+    def _gc_old_events(self):
+        """The log only feeds live dashboards, keep one day of events"""
+        self.env.cr.execute("DELETE FROM easy_exams_attempt_event WHERE create_date < (now() at time zone 'UTC') - interval '1 day'")
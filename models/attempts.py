@@ -1,4 +1,9 @@
-from odoo import models, fields
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+import datetime
+import logging
+
+_logger = logging.getLogger(__name__)
 
 class ExamAttempt(models.Model):
     _name = 'easy_exams.exam_attempt'
@@ -9,6 +14,149 @@ class ExamAttempt(models.Model):
     student_id = fields.Char(string="Student ID", required=True)
     start_time = fields.Datetime(string="Start Time", default=fields.Datetime.now)
     end_time = fields.Datetime(string="End Time")
+    deadline = fields.Datetime(string="Deadline", compute='_compute_deadline', store=True)
     score = fields.Float(string="Score")
+    is_finalized = fields.Boolean(string="Is Finalized", default=False, copy=False)
+    # Comma separated ids of the questions drawn from the exam pools, empty when the exam has no pools.
+    question_draw = fields.Char(string="Drawn Questions", copy=False)
+    # The answers were moved to easy_exams.attempt_archive, answer_ids is empty.
+    is_archived = fields.Boolean(string="Is Archived", default=False, copy=False)
     answer_ids = fields.One2many('easy_exams.question_answer', 'attempt_id', string="Answers")
-    
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if 'question_draw' not in vals and vals.get('exam_id'):
+                drawn = self.env['easy_exams.exam'].browse(vals['exam_id'])._draw_question_ids()
+                if drawn:
+                    vals['question_draw'] = ','.join(map(str, drawn))
+        records = super(ExamAttempt, self).create(vals_list)
+        self.env['easy_exams.attempt_event']._log('attempt_started', records.ids)
+        return records
+
+    def write(self, vals):
+        result = super(ExamAttempt, self).write(vals)
+        if vals.get('end_time'):
+            self.env['easy_exams.attempt_event']._log('attempt_finished', self.ids)
+        return result
+
+    def init(self):
+        # Attempts are always listed per exam, often within a start_time range.
+        create_index(self._cr, 'easy_exams_exam_attempt_exam_id_start_time_index', self._table, ['exam_id', 'start_time'])
+        # Only the attempts still to finalize, so the closing cron never scans the history.
+        create_index(self._cr, 'easy_exams_exam_attempt_unfinalized_deadline_index', self._table, ['deadline'], where='is_finalized IS NOT TRUE')
+        # Score distributions read only the finished attempts of an exam, straight from the index.
+        create_index(self._cr, 'easy_exams_exam_attempt_finished_score_index', self._table, ['exam_id', 'score'], where='end_time IS NOT NULL')
+
+    def _create_answer_sheet(self):
+        """
+        Insert one empty answer per question of the exam in a single batch, without grading.
+        :return: dict question id -> answer id.
+        """
+        self.ensure_one()
+        answers = self.env['easy_exams.question_answer'].sudo().with_context(skip_grading=True).create([{
+            'attempt_id': self.id,
+            'question_id': question_id,
+            'answer_text': '',
+        } for question_id in self._get_question_ids()])
+        return {answer.question_id.id: answer.id for answer in answers}
+
+    def _get_question_ids(self):
+        """Return the ids of the questions asked in the attempt: the drawn ones, or all the questions of the exam"""
+        self.ensure_one()
+        if self.question_draw:
+            return [int(question_id) for question_id in self.question_draw.split(',')]
+        return self.exam_id.question_ids.ids
+
+    def _get_answer_rows(self):
+        """
+        Answers of the attempts with their selected options and pairs, read from the answer
+        tables or from the archive for the archived attempts.
+        :return: dict attempt id -> list of dicts (id, question_id, answer_text, is_correct,
+            q_score, selected_options, answer_pairs)
+        """
+        archived = self.filtered('is_archived')
+        result = self.env['easy_exams.attempt_archive'].sudo()._load(archived.ids)
+        for attempt in self - archived:
+            result[attempt.id] = [{
+                'id': answer.id,
+                'question_id': answer.question_id.id,
+                'answer_text': answer.answer_text,
+                'is_correct': answer.is_correct,
+                'q_score': answer.q_score,
+                'selected_options': [{'id': opt.id, 'option_id': opt.question_option.id} for opt in answer.selected_option_ids],
+                'answer_pairs': [{
+                    'id': pair.id,
+                    'question_pair_id': pair.question_pair_id.id,
+                    'selected_match': pair.selected_match,
+                } for pair in answer.answer_pair_ids],
+            } for answer in attempt.answer_ids]
+        return result
+
+    @api.depends('start_time', 'exam_id.duration')
+    def _compute_deadline(self):
+        for attempt in self:
+            if attempt.start_time and attempt.exam_id.duration:
+                attempt.deadline = attempt.start_time + datetime.timedelta(minutes=attempt.exam_id.duration)
+            else:
+                attempt.deadline = False
+
+    def _compute_final_score(self):
+        """
+        Store the attempt score: sum of the question scores, ungraded answers (q_score 2) count as 0.
+        """
+        if not self:
+            return
+        # The drafts flush and the regrading write the scores through the ORM, send them first.
+        self.env['easy_exams.question_answer'].flush_model(['attempt_id', 'q_score'])
+        self.env.cr.execute("""
+            SELECT attempt_id, COALESCE(SUM(q_score) FILTER (WHERE q_score <> 2), 0)
+            FROM easy_exams_question_answer
+            WHERE attempt_id IN %s
+            GROUP BY attempt_id
+        """, (tuple(self.ids),))
+        scores = dict(self.env.cr.fetchall())
+        for attempt in self:
+            attempt.write({'score': scores.get(attempt.id, 0)})
+
+    def _finalize(self):
+        """
+        Close the attempts for good: apply the pending drafts, grade the answers whose grading
+        is missing or failed (q_score 2) and store the final score.
+        """
+        self.env['easy_exams.answer_draft'].sudo()._flush_drafts(attempt_ids=self.ids)
+        pending = self.env['easy_exams.question_answer'].sudo().search([
+            ('attempt_id', 'in', self.ids),
+            ('q_score', '=', 2),
+        ])
+        pending._regrade()
+        self._compute_final_score()
+        self.write({'is_finalized': True})
+
+    @api.model
+    def _cron_close_expired_attempts(self, batch_size=50):
+        """
+        Finalize the finished attempts and close the ones past their deadline that were never
+        finished (end_time is set to the deadline). Each batch is committed on its own so the
+        job never holds long locks while exams are running.
+        """
+        while True:
+            self.env.cr.execute("""
+                SELECT id FROM easy_exams_exam_attempt
+                WHERE is_finalized IS NOT TRUE
+                  AND (end_time IS NOT NULL OR deadline < now() at time zone 'UTC')
+                ORDER BY deadline
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (batch_size,))
+            attempts = self.browse([row[0] for row in self.env.cr.fetchall()])
+            if not attempts:
+                break
+            for attempt in attempts.filtered(lambda attempt: not attempt.end_time):
+                attempt.write({'end_time': attempt.deadline})
+            attempts._finalize()
+            self.env.cr.commit()
+            _logger.info("Finalized %s exam attempts", len(attempts))
+            if len(attempts) < batch_size:
+                break
+
@@ -0,0 +1,27 @@
+from odoo import models, api
+
+from ..tools.auth_cache import SECRET_KEY_PARAM, invalidate_secret_key
+
+class IrConfigParameter(models.Model):
+    _inherit = 'ir.config_parameter'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super(IrConfigParameter, self).create(vals_list)
+        if any(vals.get('key') == SECRET_KEY_PARAM for vals in vals_list):
+            invalidate_secret_key(self.env.cr.dbname)
+        return records
+
+    def write(self, vals):
+        touches_secret = SECRET_KEY_PARAM in self.mapped('key') or vals.get('key') == SECRET_KEY_PARAM
+        result = super(IrConfigParameter, self).write(vals)
+        if touches_secret:
+            invalidate_secret_key(self.env.cr.dbname)
+        return result
+
+    def unlink(self):
+        touches_secret = SECRET_KEY_PARAM in self.mapped('key')
+        result = super(IrConfigParameter, self).unlink()
+        if touches_secret:
+            invalidate_secret_key(self.env.cr.dbname)
+        return result
@@ -1,12 +1,77 @@
-from odoo import models, fields
+from odoo import models, fields, api, tools
 class Course(models.Model):
     _name = 'easy_exams.course'
     _description = 'Course'
 
     name = fields.Char(string="Course Name", required=True)
     description = fields.Text(string="Description")
-    code = fields.Char(string="Course Code", required=True, unique=True)
+    code = fields.Char(string="Course Code", required=True)
     access_key = fields.Char(string="Access Key", required=True)
     exam_ids = fields.One2many('easy_exams.exam', 'course_id', string="Exams")
     user_ids = fields.Many2many('res.users', string="Authorized Users")
-    
\ No newline at end of file
+    retention_days = fields.Integer(string="Keep Attempts (days)", default=0,
+                                    help="Finished attempts are deleted this many days after their end. 0 keeps them.")
+    # Deleted courses are only deactivated, easy_exams.retention deletes their data later.
+    active = fields.Boolean(string="Active", default=True)
+    deleted_at = fields.Datetime(string="Deleted At", copy=False)
+
+    _sql_constraints = [
+        ('code_unique', 'unique(code)', 'The course code is already used by another course.'),
+        ('retention_days_positive', 'CHECK(retention_days >= 0)', 'The retention must be zero or a number of days.'),
+    ]
+
+    # Course membership is cached per user and membership version by _get_managed_course_ids:
+    # creating, deleting or (de)activating a course or changing its members bumps the version
+    # of its members only, no other cache is cleared.
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super(Course, self).create(vals_list)
+        self._bump_member_versions(records.user_ids.ids)
+        return records
+
+    def write(self, vals):
+        members = self.user_ids.ids if 'user_ids' in vals or 'active' in vals else []
+        result = super(Course, self).write(vals)
+        if 'user_ids' in vals or 'active' in vals:
+            self._bump_member_versions(set(members) | set(self.user_ids.ids))
+        return result
+
+    def unlink(self):
+        members = self.user_ids.ids
+        result = super(Course, self).unlink()
+        self._bump_member_versions(members)
+        return result
+
+    @api.model
+    def _bump_member_versions(self, user_ids):
+        """Drop the cached memberships of the users, in every worker."""
+        if not user_ids:
+            return
+        self.env.cr.execute(
+            "UPDATE res_users SET easy_course_version = easy_course_version + 1 WHERE id IN %s",
+            (tuple(user_ids),)
+        )
+        self.env['res.users'].browse(list(user_ids)).invalidate_recordset(['easy_course_version'])
+
+    def _soft_delete(self):
+        """
+        Hide the courses and their exams, the retention cron deletes them in batches.
+        :return: The attempts in progress ended with the exams.
+        """
+        running = self.exam_ids._soft_delete()
+        self.write({'active': False, 'deleted_at': fields.Datetime.now()})
+        return running
+
+    @api.model
+    def _member_version(self, user_id):
+        """Current membership version of the user, the cache key of _get_managed_course_ids."""
+        return self.env['res.users'].sudo().browse(user_id).easy_course_version
+
+    @api.model
+    @tools.ormcache('user_id', 'version')
+    def _get_managed_course_ids(self, user_id, version):
+        """
+        Return the ids of the courses the user can manage.
+        Cached per membership version of the user (_member_version).
+        """
+        return frozenset(self.sudo().search([('user_ids', 'in', [user_id])]).ids)
@@ -0,0 +1,40 @@
+from odoo import models, api
+
+class ExamContentMixin(models.AbstractModel):
+    _name = 'easy_exams.exam_content_mixin'
+    _description = 'Exam Content Mixin'
+
+    # Fields whose text is part of the search document of the questions.
+    _search_fields = ()
+
+    def _get_content_exams(self):
+        """Return the exams whose content the records are part of, overridden by every model using the mixin"""
+        return self.env['easy_exams.exam']
+
+    def _get_content_questions(self):
+        """Return the questions whose search document contains the records text, overridden by every model using the mixin"""
+        return self.env['easy_exams.question']
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super(ExamContentMixin, self).create(vals_list)
+        records._get_content_exams()._bump_content_version()
+        records._get_content_questions()._refresh_search_vector()
+        return records
+
+    def write(self, vals):
+        exams = self._get_content_exams()
+        questions = self._get_content_questions()
+        result = super(ExamContentMixin, self).write(vals)
+        (exams | self._get_content_exams())._bump_content_version()
+        if 'question_id' in vals or set(vals) & set(self._search_fields):
+            (questions | self._get_content_questions())._refresh_search_vector()
+        return result
+
+    def unlink(self):
+        exams = self._get_content_exams()
+        questions = self._get_content_questions()
+        result = super(ExamContentMixin, self).unlink()
+        exams.exists()._bump_content_version()
+        questions.exists()._refresh_search_vector()
+        return result
@@ -0,0 +1,29 @@
+from odoo import models, fields
+
+class ExamPool(models.Model):
+    _name = 'easy_exams.exam_pool'
+    _description = 'Exam Question Pool'
+    _inherit = ['easy_exams.exam_content_mixin']
+    _order = 'sequence, id'
+
+    exam_id = fields.Many2one('easy_exams.exam', string="Exam", required=True, index=True, ondelete='cascade')
+    question_type = fields.Selection([
+        ('multiple_choice', 'Multiple Choice'),
+        ('fill_in_the_blank', 'Fill in the Blank'),
+        ('short_answer', 'Short Answer'),
+        ('long_answer', 'Long Answer'),
+        ('matching', 'Matching')
+    ], string="Question Type", help="Only questions of this type, any type when empty.")
+    tag = fields.Char(string="Tag", help="Only questions with this tag, any tag when empty.")
+    draw_count = fields.Integer(string="Questions Drawn", required=True, default=1)
+    sequence = fields.Integer(string="Sequence", default=10)
+
+    _sql_constraints = [
+        ('draw_count_positive', 'CHECK(draw_count > 0)', 'A pool must draw at least one question.'),
+    ]
+
+    def _get_content_exams(self):
+        return self.exam_id
+
+    def _get_content_questions(self):
+        return self.env['easy_exams.question']
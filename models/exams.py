@@ -1,21 +1,95 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 from odoo.exceptions import ValidationError
+import random
 
 class Exam(models.Model):
     _name = 'easy_exams.exam'
     _description = 'Exam'
 
     name = fields.Char(string="Exam Title", required=True)
-    course_id = fields.Many2one('easy_exams.course', string="Course", required=True, ondelete="cascade")
+    course_id = fields.Many2one('easy_exams.course', string="Course", required=True, index=True, ondelete="cascade")
     description = fields.Text(string="Description")
     question_ids = fields.One2many('easy_exams.question', 'exam_id', string="Questions", order='id asc')
     access_code = fields.Char(string="Access Code", required=True)
     duration = fields.Integer(string="Duration (minutes)")
     is_active = fields.Boolean(string='Is the exam active to responses?', default= False)
+    content_version = fields.Integer(string="Content Version", default=0, copy=False)
+    pool_ids = fields.One2many('easy_exams.exam_pool', 'exam_id', string="Question Pools")
+    # Deleted exams are only deactivated, easy_exams.retention deletes their data later.
+    active = fields.Boolean(string="Active", default=True)
+    deleted_at = fields.Datetime(string="Deleted At", copy=False)
+
+    _sql_constraints = [
+        ('access_code_unique', 'unique(access_code)', 'The access code is already used by another exam.'),
+    ]
     
     @api.constrains('duration')
     def _check_duration(self):
         """Ensure exam duration is positive."""
         for exam in self:
             if exam.duration <= 0:
-                raise ValidationError("Exam duration must be greater than zero.")
\ No newline at end of file
+                raise ValidationError("Exam duration must be greater than zero.")
+
+    def _soft_delete(self):
+        """
+        Hide the exams and close them to responses, the retention cron deletes them in batches.
+        The attempts in progress are ended now, the closing cron finalizes them.
+        :return: The attempts ended, for the callers to close their sessions.
+        """
+        now = fields.Datetime.now()
+        running = self.env['easy_exams.exam_attempt'].sudo().search([('exam_id', 'in', self.ids), ('end_time', '=', False)])
+        if running:
+            running.write({'end_time': now})
+        self.write({'active': False, 'is_active': False, 'deleted_at': now})
+        return running
+
+    def _bump_content_version(self):
+        """
+        Mark the questions, options or pairs of the exams as changed, so the cached
+        delivery payloads of every worker stop being used.
+        """
+        if not self:
+            return
+        self.env.cr.execute(
+            "UPDATE easy_exams_exam SET content_version = content_version + 1 WHERE id IN %s",
+            (tuple(self.ids),)
+        )
+        self.invalidate_recordset(['content_version'])
+
+    @api.model
+    @tools.ormcache('exam_id', 'content_version')
+    def _get_pool_arrays(self, exam_id, content_version):
+        """
+        Return the pools of the exam as (draw count, question ids) pairs. Every question
+        belongs to the first pool (by sequence) it matches, so pools never draw it twice.
+        Cached per content version: editing questions or pools bumps it.
+        """
+        self.env.cr.execute("""
+            SELECT question_type, tag, draw_count FROM easy_exams_exam_pool
+            WHERE exam_id = %s ORDER BY sequence, id
+        """, (exam_id,))
+        pools = self.env.cr.fetchall()
+        if not pools:
+            return ()
+        self.env.cr.execute("SELECT id, question_type, tag FROM easy_exams_question WHERE exam_id = %s ORDER BY id", (exam_id,))
+        pool_question_ids = [[] for _pool in pools]
+        for question_id, question_type, tag in self.env.cr.fetchall():
+            for index, (pool_type, pool_tag, _draw_count) in enumerate(pools):
+                if (not pool_type or pool_type == question_type) and (not pool_tag or pool_tag == tag):
+                    pool_question_ids[index].append(question_id)
+                    break
+        return tuple((draw_count, tuple(ids)) for (_type, _tag, draw_count), ids in zip(pools, pool_question_ids))
+
+    def _draw_question_ids(self):
+        """
+        Draw the questions of a new attempt from the pools of the exam, the number of
+        questions drawn at most. None when the exam has no pools: every question is asked.
+        """
+        self.ensure_one()
+        pools = self._get_pool_arrays(self.id, self.content_version)
+        if not pools:
+            return None
+        drawn = []
+        for draw_count, question_ids in pools:
+            drawn.extend(random.sample(question_ids, min(draw_count, len(question_ids))))
+        return drawn
@@ -0,0 +1,110 @@
+import json
+import logging
+import random
+import threading
+import time
+from odoo import models
+from odoo.http import request
+
+from ..tools.metrics import metrics
+from ..tools.profiling import SqlRecorder, StackSampler, redact
+
+_logger = logging.getLogger(__name__)
+
+# Routes of the module, the other requests of the server are not measured.
+ROUTE_PREFIXES = ('/api/exams/', '/api/easy_apps/exams/')
+
+# Slow request sampler, off unless the threshold is set.
+SLOW_REQUEST_MS_PARAM = 'easy_exams_slow_request_ms'
+# Share (0 to 1) of the requests also profiled while the sampler is on.
+SLOW_REQUEST_PROFILE_RATE_PARAM = 'easy_exams_slow_request_profile_rate'
+
+class IrHttp(models.AbstractModel):
+    _inherit = 'ir.http'
+
+    @classmethod
+    def _pre_dispatch(cls, rule, args):
+        super()._pre_dispatch(rule, args)
+        thread = threading.current_thread()
+        # A request that raised never reached _post_dispatch, do not leave its hooks behind.
+        cls._easy_exams_stop_capture(getattr(thread, 'easy_exams_request', None), thread)
+        thread.easy_exams_request = None
+        if not rule.rule.startswith(ROUTE_PREFIXES):
+            return
+
+        measure = {
+            'route': rule.rule,
+            'start': time.perf_counter(),
+            'query_count': getattr(thread, 'query_count', 0),
+            'query_time': getattr(thread, 'query_time', 0.0),
+            'llm_calls': 0,
+            'llm_duration': 0.0,
+            'slow_ms': None,
+            'sql': None,
+            'profile': None,
+        }
+        params = request.env['ir.config_parameter'].sudo()
+        try:
+            slow_ms = float(params.get_param(SLOW_REQUEST_MS_PARAM) or 0)
+            profile_rate = float(params.get_param(SLOW_REQUEST_PROFILE_RATE_PARAM) or 0)
+        except ValueError:
+            slow_ms = profile_rate = 0
+        if slow_ms > 0:
+            # Below the threshold the cost is one list append per query, thrown away at the end.
+            measure['slow_ms'] = slow_ms
+            measure['sql'] = SqlRecorder()
+            measure['sql'].attach(thread)
+            if profile_rate > 0 and random.random() < profile_rate:
+                measure['profile'] = StackSampler(thread).start()
+        thread.easy_exams_request = measure
+
+    @classmethod
+    def _post_dispatch(cls, response):
+        super()._post_dispatch(response)
+        thread = threading.current_thread()
+        measure = getattr(thread, 'easy_exams_request', None)
+        if measure is None:
+            return
+        thread.easy_exams_request = None
+        cls._easy_exams_stop_capture(measure, thread)
+
+        duration = time.perf_counter() - measure['start']
+        queries = getattr(thread, 'query_count', 0) - measure['query_count']
+        sql_duration = getattr(thread, 'query_time', 0.0) - measure['query_time']
+        status = getattr(response, 'status_code', 200)
+        metrics.observe_request(
+            route=measure['route'],
+            method=request.httprequest.method,
+            status=status,
+            duration=duration,
+            queries=queries,
+            sql_duration=sql_duration,
+            # None for streamed responses (server-sent events)
+            response_bytes=response.calculate_content_length() if hasattr(response, 'calculate_content_length') else None,
+            llm_calls=measure['llm_calls'],
+            llm_duration=measure['llm_duration'],
+        )
+
+        if measure['slow_ms'] and duration * 1000 >= measure['slow_ms']:
+            record = {
+                'route': measure['route'],
+                'method': request.httprequest.method,
+                'path': request.httprequest.path,
+                'params': redact(dict(request.params)),
+                'status': status,
+                'ms': round(duration * 1000, 1),
+                'sql': dict(measure['sql'].summary(), ms=round(sql_duration * 1000, 1)),
+                'llm': {'calls': measure['llm_calls'], 'ms': round(measure['llm_duration'] * 1000, 1)},
+            }
+            if measure['profile']:
+                record['profile'] = measure['profile'].summary()
+            _logger.warning("Slow request %s %.0f ms: %s", measure['route'], duration * 1000, json.dumps(record, default=str))
+
+    @classmethod
+    def _easy_exams_stop_capture(cls, measure, thread):
+        if not measure:
+            return
+        if measure['sql']:
+            measure['sql'].detach(thread)
+        if measure['profile']:
+            measure['profile'].stop()
@@ -0,0 +1,242 @@
+from odoo import models, api
+from odoo.exceptions import ValidationError
+import math
+import numpy as np
+
+# Share of the attempts in the upper and lower groups of the discrimination index.
+GROUP_SHARE = 0.27
+# Most bins a score histogram may span between the lowest and the highest score.
+MAX_HISTOGRAM_BINS = 1000
+
+def _to_list(values):
+    """NumPy array to a JSON friendly list, NaN becomes None"""
+    return [None if np.isnan(value) else round(float(value), 4) for value in values]
+
+class ItemAnalysis(models.AbstractModel):
+    _name = 'easy_exams.item_analysis'
+    _description = 'Item Analysis'
+
+    @api.model
+    def _load_score_matrix(self, exam_id, archived_scores):
+        """
+        Load the attempt x question matrix of q_score of the exam with one query,
+        plus the archived attempts (archived_scores, from easy_exams.attempt_archive._load_exam_scores). Unanswered or ungraded (q_score 2) questions count as 0,
+        the questions an attempt did not draw from the exam pools are NaN.
+        :return: (question ids, attempt ids, matrix)
+        """
+        self.env.cr.execute("SELECT id FROM easy_exams_question WHERE exam_id = %s ORDER BY id", (exam_id,))
+        question_ids = np.array([row[0] for row in self.env.cr.fetchall()], dtype=np.int64)
+
+        self.env.cr.execute("""
+            SELECT ans.attempt_id, ans.question_id, ans.q_score
+            FROM easy_exams_question_answer ans
+            JOIN easy_exams_exam_attempt a ON a.id = ans.attempt_id
+            WHERE a.exam_id = %s
+        """, (exam_id,))
+        rows = self.env.cr.fetchall()
+        rows = np.array(rows + archived_scores, dtype=np.float64).reshape(-1, 3)
+
+        attempt_ids, attempt_index = np.unique(rows[:, 0].astype(np.int64), return_inverse=True)
+        question_index = np.searchsorted(question_ids, rows[:, 1].astype(np.int64))
+        known = (question_index < len(question_ids))
+        known[known] = question_ids[question_index[known]] == rows[known, 1]
+
+        scores = rows[:, 2]
+        scores = np.where(scores == 2, 0.0, scores)
+        matrix = np.zeros((len(attempt_ids), len(question_ids)), dtype=np.float64)
+        matrix[attempt_index[known], question_index[known]] = scores[known]
+
+        if len(attempt_ids):
+            self.env.cr.execute("""
+                SELECT id, question_draw FROM easy_exams_exam_attempt
+                WHERE id IN %s AND question_draw IS NOT NULL AND question_draw <> ''
+            """, (tuple(attempt_ids.tolist()),))
+            for attempt_id, question_draw in self.env.cr.fetchall():
+                asked = np.isin(question_ids, [int(question_id) for question_id in question_draw.split(',')])
+                matrix[np.searchsorted(attempt_ids, attempt_id), ~asked] = np.nan
+        return question_ids, attempt_ids, matrix
+
+    @api.model
+    def _load_option_counts(self, exam_id, archived_selections):
+        """
+        Number of attempts that selected each option of the exam questions, archived ones included
+        (archived_selections, from easy_exams.attempt_archive._load_exam_scores).
+        """
+        self.env.cr.execute("""
+            SELECT o.id, o.question_id, o.content, o.is_correct, COUNT(ao.id)
+            FROM easy_exams_question_option o
+            JOIN easy_exams_question q ON q.id = o.question_id
+            LEFT JOIN easy_exams_answer_option ao ON ao.question_option = o.id
+            WHERE q.exam_id = %s
+            GROUP BY o.id
+            ORDER BY o.question_id, o.sequence, o.id
+        """, (exam_id,))
+        rows = self.env.cr.fetchall()
+        return [(option_id, question_id, content, is_correct, count + archived_selections.get(option_id, 0))
+                for option_id, question_id, content, is_correct, count in rows]
+
+    @api.model
+    def _compute_statistics(self, matrix):
+        """
+        Classical test theory statistics of a score matrix (attempts x questions), vectorized.
+        NaN cells (questions not drawn by the attempt) are left out of every statistic.
+        :return: dict of arrays per question (difficulty, point_biserial, discrimination,
+            asked: number of attempts asked the question) and the Cronbach's alpha of the exam.
+        """
+        attempts, items = matrix.shape
+        asked = (~np.isnan(matrix)).astype(np.float64)
+        if not attempts:
+            empty = np.full(items, np.nan)
+            return {'difficulty': empty, 'point_biserial': empty, 'discrimination': empty,
+                    'asked': np.zeros(items), 'cronbach_alpha': None}
+        scores = np.nan_to_num(matrix)
+        asked_count = asked.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            difficulty = scores.sum(axis=0) / asked_count
+
+            # Corrected item-total correlation: each item against the total of the other items,
+            # over the attempts asked the item.
+            totals = scores.sum(axis=1)
+            rest = totals[:, None] - scores
+            item_dev = (scores - difficulty) * asked
+            rest_dev = (rest - (rest * asked).sum(axis=0) / asked_count) * asked
+            point_biserial = (item_dev * rest_dev).sum(axis=0) / np.sqrt((item_dev ** 2).sum(axis=0) * (rest_dev ** 2).sum(axis=0))
+
+            # Upper-lower index: mean score of the best 27% minus mean score of the worst 27%,
+            # ranked by the mean score over the questions asked (attempts draw different counts).
+            group_size = int(np.floor(attempts * GROUP_SHARE))
+            if group_size:
+                order = np.argsort(totals / asked.sum(axis=1), kind='stable')
+                upper, lower = order[-group_size:], order[:group_size]
+                discrimination = (scores[upper].sum(axis=0) / asked[upper].sum(axis=0)
+                                  - scores[lower].sum(axis=0) / asked[lower].sum(axis=0))
+            else:
+                discrimination = np.full(items, np.nan)
+
+            # Item covariances from the pairwise complete attempts, the total variance is their sum.
+            # Without NaN cells this is the usual k/(k-1) * (1 - sum of item variances / total variance).
+            if items > 1 and attempts > 1:
+                pair_counts = asked.T @ asked
+                pair_sums = scores.T @ asked
+                covariance = (scores.T @ scores - pair_sums * pair_sums.T / pair_counts) / (pair_counts - 1)
+                alpha = items / (items - 1) * (1 - np.trace(covariance) / covariance.sum())
+            else:
+                alpha = np.nan
+
+        return {
+            'difficulty': difficulty,
+            'point_biserial': point_biserial,
+            'discrimination': discrimination,
+            'asked': asked_count,
+            'cronbach_alpha': None if not np.isfinite(alpha) else round(float(alpha), 4),
+        }
+
+    @api.model
+    def _analyze_exam(self, exam_id):
+        """
+        Item analysis of the exam: difficulty (p-value), corrected point-biserial and
+        upper-lower discrimination per question, option selection frequencies and Cronbach's alpha.
+        """
+        # Every archive blob of the exam is decompressed once, for both the scores and the options.
+        archived_scores, archived_selections = self.env['easy_exams.attempt_archive']._load_exam_scores(exam_id)
+        question_ids, attempt_ids, matrix = self._load_score_matrix(exam_id, archived_scores)
+        statistics = self._compute_statistics(matrix)
+
+        asked = dict(zip(question_ids.tolist(), statistics['asked'].tolist()))
+        options_by_question = {}
+        for option_id, question_id, content, is_correct, count in self._load_option_counts(exam_id, archived_selections):
+            options_by_question.setdefault(question_id, []).append({
+                'option_id': option_id,
+                'content': content,
+                'is_correct': is_correct,
+                'count': count,
+                'proportion': round(count / asked[question_id], 4) if asked.get(question_id) else None,
+            })
+
+        questions = self.env['easy_exams.question'].sudo().browse(question_ids.tolist())
+        question_types = {question.id: question.question_type for question in questions}
+        difficulty = _to_list(statistics['difficulty'])
+        point_biserial = _to_list(statistics['point_biserial'])
+        discrimination = _to_list(statistics['discrimination'])
+
+        return {
+            'exam_id': exam_id,
+            'attempt_count': len(attempt_ids),
+            'question_count': len(question_ids),
+            'cronbach_alpha': statistics['cronbach_alpha'],
+            'questions': [{
+                'question_id': int(question_id),
+                'question_type': question_types.get(int(question_id)),
+                'attempt_count': int(statistics['asked'][index]),
+                'difficulty': difficulty[index],
+                'point_biserial': point_biserial[index],
+                'discrimination': discrimination[index],
+                'options': options_by_question.get(int(question_id), []),
+            } for index, question_id in enumerate(question_ids)],
+        }
+
+    @api.model
+    def _score_distribution(self, exam_id, bin_width=1.0, quantiles=(0.25, 0.5, 0.75, 0.9), student_id=None):
+        """
+        Score distribution of the finished attempts of the exam, aggregated in the database:
+        histogram with bins of bin_width, requested quantiles and, if student_id is given,
+        the percentile rank of each attempt of that student.
+        """
+        self.env.cr.execute("""
+            SELECT COUNT(*), AVG(score), STDDEV_SAMP(score), MIN(score), MAX(score),
+                   percentile_cont(%s::float8[]) WITHIN GROUP (ORDER BY score)
+            FROM easy_exams_exam_attempt
+            WHERE exam_id = %s AND end_time IS NOT NULL
+        """, (list(quantiles), exam_id))
+        count, mean, stddev, minimum, maximum, values = self.env.cr.fetchone()
+        if count:
+            first_bin, last_bin = minimum / bin_width, maximum / bin_width
+            if not (math.isfinite(first_bin) and math.isfinite(last_bin)) or last_bin - first_bin > MAX_HISTOGRAM_BINS:
+                raise ValidationError(f"bin_width is too small: the histogram would have more than {MAX_HISTOGRAM_BINS} bins")
+
+        self.env.cr.execute("""
+            SELECT FLOOR(score / %s) AS bucket, COUNT(*)
+            FROM easy_exams_exam_attempt
+            WHERE exam_id = %s AND end_time IS NOT NULL
+            GROUP BY bucket
+            ORDER BY bucket
+        """, (bin_width, exam_id))
+        histogram = [{
+            'lower': round(bucket * bin_width, 4),
+            'upper': round((bucket + 1) * bin_width, 4),
+            'count': bucket_count,
+        } for bucket, bucket_count in self.env.cr.fetchall()]
+
+        result = {
+            'exam_id': exam_id,
+            'attempt_count': count,
+            'mean': round(mean, 4) if mean is not None else None,
+            'stddev': round(stddev, 4) if stddev is not None else None,
+            'min': minimum,
+            'max': maximum,
+            'bin_width': bin_width,
+            'histogram': histogram,
+            'quantiles': [{'q': q, 'score': value} for q, value in zip(quantiles, values or [None] * len(quantiles))],
+        }
+
+        if student_id:
+            # percent_rank: share of the other finished attempts with a strictly lower score.
+            self.env.cr.execute("""
+                SELECT id, score, percent_rank
+                FROM (
+                    SELECT id, student_id, score, percent_rank() OVER (ORDER BY score)
+                    FROM easy_exams_exam_attempt
+                    WHERE exam_id = %s AND end_time IS NOT NULL
+                ) ranked
+                WHERE student_id = %s
+                ORDER BY id
+            """, (exam_id, student_id))
+            result['student'] = {
+                'student_id': student_id,
+                'attempts': [{
+                    'attempt_id': attempt_id,
+                    'score': score,
+                    'percentile_rank': round(rank * 100, 2),
+                } for attempt_id, score, rank in self.env.cr.fetchall()],
+            }
+        return result
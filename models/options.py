@@ -3,7 +3,17 @@ from odoo import models, fields
 class QuestionOption(models.Model):
     _name = 'easy_exams.question_option'
     _description = 'Question Option'
+    _inherit = ['easy_exams.exam_content_mixin']
+    _order = 'sequence, id'
+    _search_fields = ('content',)
 
-    question_id = fields.Many2one('easy_exams.question', string="Question", required=True, ondelete='cascade')
+    question_id = fields.Many2one('easy_exams.question', string="Question", required=True, index=True, ondelete='cascade')
     content = fields.Char(string="Option Content", required=True)
     is_correct = fields.Boolean(string="Is Correct", default=False)
+    sequence = fields.Integer(string="Sequence", default=10)
+
+    def _get_content_exams(self):
+        return self.question_id.exam_id
+
+    def _get_content_questions(self):
+        return self.question_id
@@ -3,7 +3,17 @@ from odoo import models, fields
 class QuestionPair(models.Model):
     _name = 'easy_exams.question_pair'
     _description = 'Question Pair'
+    _inherit = ['easy_exams.exam_content_mixin']
+    _order = 'sequence, id'
+    _search_fields = ('term', 'match')
 
-    question_id = fields.Many2one('easy_exams.question', string="Question", required=True, ondelete="cascade")
+    question_id = fields.Many2one('easy_exams.question', string="Question", required=True, index=True, ondelete="cascade")
     term = fields.Char(string="Term", required=True)
     match = fields.Char(string="Match", required=True)
+    sequence = fields.Integer(string="Sequence", default=10)
+
+    def _get_content_exams(self):
+        return self.question_id.exam_id
+
+    def _get_content_questions(self):
+        return self.question_id
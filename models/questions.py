@@ -1,10 +1,24 @@
-from odoo import models, fields
+from odoo import models, fields, api
+from odoo.tools import html_escape
+
+# Text search configuration of the question bank. 'simple' does no stemming and has no
+# stop words, questions are written in any language.
+SEARCH_CONFIG = 'simple'
+# ts_headline marks the matches with these control characters instead of tags: the snippet is
+# escaped first, then the markers become <b> tags (the questions are not trusted HTML).
+HIGHLIGHT_START, HIGHLIGHT_STOP = '\x02', '\x03'
+
+def _highlight(snippet):
+    """HTML of a ts_headline snippet: escaped text, matches in <b> tags."""
+    return str(html_escape(snippet or '')).replace(HIGHLIGHT_START, '<b>').replace(HIGHLIGHT_STOP, '</b>')
 
 class Question(models.Model):
     _name = 'easy_exams.question'
     _description = 'Question'
+    _inherit = ['easy_exams.exam_content_mixin']
+    _search_fields = ('content', 'correct_answer')
 
-    exam_id = fields.Many2one('easy_exams.exam', string="Exam", required=True,ondelete='cascade')
+    exam_id = fields.Many2one('easy_exams.exam', string="Exam", required=True, index=True, ondelete='cascade')
     question_type = fields.Selection([
         ('multiple_choice', 'Multiple Choice'),
         ('fill_in_the_blank', 'Fill in the Blank'),
@@ -14,6 +28,103 @@ class Question(models.Model):
     ], string="Question Type", required=True)
     content = fields.Text(string="Content", required=True)
     image = fields.Image(string="Image") 
+    image_1024 = fields.Image(string="Image 1024", related='image', max_width=1024, max_height=1024, store=True)
     option_ids = fields.One2many('easy_exams.question_option', 'question_id', string="Options")
     pair_ids = fields.One2many('easy_exams.question_pair', 'question_id', string="Pairs")
     correct_answer = fields.Text(string="Correct Answer")
+    tag = fields.Char(string="Tag", help="Groups the questions of the bank for the exam pools.")
+
+    def init(self):
+        # search_vector is not an ORM field: a tsvector of the content, options and pairs,
+        # kept up to date by _refresh_search_vector.
+        self._cr.execute(f"ALTER TABLE {self._table} ADD COLUMN IF NOT EXISTS search_vector tsvector")
+        self._cr.execute(f"CREATE INDEX IF NOT EXISTS easy_exams_question_search_vector_index ON {self._table} USING gin (search_vector)")
+
+    def _get_content_exams(self):
+        return self.exam_id
+
+    def _get_content_questions(self):
+        return self
+
+    def _refresh_search_vector(self):
+        """
+        Recompute the search document of the questions: content (weight A), options and
+        pair terms (weight B) and correct answer (weight C), in a single statement.
+        """
+        if not self:
+            return
+        # The texts are read from the tables, send the pending ORM writes first.
+        self.flush_model(['content', 'correct_answer'])
+        self.env['easy_exams.question_option'].flush_model(['question_id', 'content'])
+        self.env['easy_exams.question_pair'].flush_model(['question_id', 'term', 'match'])
+        self.env.cr.execute("""
+            UPDATE easy_exams_question q
+            SET search_vector =
+                setweight(to_tsvector(%(config)s, coalesce(q.content, '')), 'A') ||
+                setweight(to_tsvector(%(config)s, coalesce((
+                    SELECT string_agg(o.content, ' ') FROM easy_exams_question_option o WHERE o.question_id = q.id
+                ), '')), 'B') ||
+                setweight(to_tsvector(%(config)s, coalesce((
+                    SELECT string_agg(p.term || ' ' || p.match, ' ') FROM easy_exams_question_pair p WHERE p.question_id = q.id
+                ), '')), 'B') ||
+                setweight(to_tsvector(%(config)s, coalesce(q.correct_answer, '')), 'C')
+            WHERE q.id IN %(ids)s
+        """, {'config': SEARCH_CONFIG, 'ids': tuple(self.ids)})
+
+    @api.model
+    def _search_bank(self, course_ids, text, question_type=None, limit=20, offset=0):
+        """
+        Ranked full text search of the questions of the courses.
+        :param text: Search terms, web search syntax ("quoted phrase", or, -excluded).
+        :return: (total number of matches, page of results with a highlighted snippet)
+        """
+        if not course_ids or not (text or '').strip():
+            return 0, []
+        params = {
+            'config': SEARCH_CONFIG,
+            'text': text,
+            'course_ids': tuple(course_ids),
+            'question_type': question_type,
+            'limit': limit,
+            'offset': offset,
+            'markers': HIGHLIGHT_START + HIGHLIGHT_STOP,
+            'headline_options': f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}", MaxWords=35, MinWords=15, MaxFragments=2',
+        }
+        type_filter = "AND q.question_type = %(question_type)s" if question_type else ""
+        # Snippets are only built for the rows of the page.
+        self.env.cr.execute(f"""
+            WITH matches AS (
+                SELECT q.id, q.exam_id, q.question_type, ts_rank_cd(q.search_vector, query) AS rank,
+                       count(*) OVER () AS total, query
+                FROM easy_exams_question q
+                JOIN easy_exams_exam e ON e.id = q.exam_id,
+                     websearch_to_tsquery(%(config)s, %(text)s) query
+                WHERE q.search_vector @@ query AND e.course_id IN %(course_ids)s {type_filter}
+                ORDER BY rank DESC, q.id DESC
+                LIMIT %(limit)s OFFSET %(offset)s
+            )
+            SELECT m.id, m.exam_id, e.name, e.course_id, m.question_type, m.rank, m.total,
+                   ts_headline(%(config)s, translate(concat_ws(' | ', q.content,
+                       (SELECT string_agg(o.content, ' | ') FROM easy_exams_question_option o WHERE o.question_id = q.id),
+                       (SELECT string_agg(p.term || ' - ' || p.match, ' | ') FROM easy_exams_question_pair p WHERE p.question_id = q.id)
+                   ), %(markers)s, ''), m.query, %(headline_options)s)
+            FROM matches m
+            JOIN easy_exams_question q ON q.id = m.id
+            JOIN easy_exams_exam e ON e.id = m.exam_id
+            ORDER BY m.rank DESC, m.id DESC
+        """, params)
+        rows = self.env.cr.fetchall()
+        if not rows and offset:
+            # Page past the last match, the total still comes from the first page.
+            total, _page = self._search_bank(course_ids, text, question_type=question_type, limit=1)
+            return total, []
+        total = rows[0][6] if rows else 0
+        return total, [{
+            'id': question_id,
+            'exam_id': exam_id,
+            'exam_name': exam_name,
+            'course_id': course_id,
+            'question_type': q_type,
+            'rank': round(rank, 4),
+            'snippet': _highlight(snippet),
+        } for question_id, exam_id, exam_name, course_id, q_type, rank, _total, snippet in rows]
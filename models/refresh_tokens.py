@@ -0,0 +1,80 @@
+from odoo import models, fields, api
+import datetime
+import hashlib
+import secrets
+
+REFRESH_TOKEN_LIFETIME = datetime.timedelta(days=30)
+# XML id of the group allowed to use the API, as checked at login.
+GROUP_PARAM = 'easy_app_group_id'
+
+def _hash_token(raw_token):
+    return hashlib.sha256(raw_token.encode('utf-8')).hexdigest()
+
+class RefreshToken(models.Model):
+    _name = 'easy_exams.refresh_token'
+    _description = 'Refresh Token'
+
+    user_id = fields.Many2one('res.users', string="User", required=True, index=True, ondelete='cascade')
+    # Indexed by its unique constraint.
+    token_hash = fields.Char(string="Token Hash", required=True)
+    expires_at = fields.Datetime(string="Expires At", required=True)
+    revoked = fields.Boolean(string="Revoked", default=False)
+    replaced_by_id = fields.Many2one('easy_exams.refresh_token', string="Replaced By", ondelete='set null')
+
+    _sql_constraints = [
+        ('token_hash_unique', 'unique(token_hash)', 'Refresh token already exists.'),
+    ]
+
+    @api.model
+    def _issue(self, user):
+        """
+        Create a refresh token for the user.
+        Only the SHA-256 of the token is stored, the raw value is returned once to the client.
+        """
+        raw_token = secrets.token_urlsafe(48)
+        record = self.sudo().create({
+            'user_id': user.id,
+            'token_hash': _hash_token(raw_token),
+            'expires_at': fields.Datetime.now() + REFRESH_TOKEN_LIFETIME,
+        })
+        return record, raw_token
+
+    @api.model
+    def _find(self, raw_token):
+        return self.sudo().search([('token_hash', '=', _hash_token(raw_token))], limit=1)
+
+    @api.model
+    def _rotate(self, raw_token):
+        """
+        Exchange a valid refresh token for a new one and revoke the old one.
+        Presenting an already revoked token revokes every token of its user, since it means
+        the token was stolen or replayed. So does a user archived or removed from the API group
+        since the login.
+        :return: (user, new raw token) or (None, None) when the token is not valid.
+        """
+        token = self._find(raw_token)
+        if not token:
+            return None, None
+        if token.revoked:
+            self._revoke_user(token.user_id)
+            return None, None
+        if token.expires_at <= fields.Datetime.now():
+            return None, None
+        user = token.user_id
+        group = self.env['ir.config_parameter'].sudo().get_param(GROUP_PARAM)
+        if not user.active or not group or not user.has_group(group):
+            self._revoke_user(user)
+            return None, None
+
+        new_token, new_raw_token = self._issue(user)
+        token.write({'revoked': True, 'replaced_by_id': new_token.id})
+        return user, new_raw_token
+
+    @api.model
+    def _revoke_user(self, user):
+        self.sudo().search([('user_id', '=', user.id), ('revoked', '=', False)]).write({'revoked': True})
+
+    @api.autovacuum
+    def _gc_expired_tokens(self):
+        """Delete the expired refresh tokens"""
+        self.sudo().search([('expires_at', '<', fields.Datetime.now())]).unlink()
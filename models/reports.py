@@ -0,0 +1,129 @@
+from odoo import models, fields, tools
+
+# Answers of the questions drawn by their attempt (every question when the exam has no pools).
+DRAWN_FILTER = "(COALESCE(a.question_draw, '') = '' OR ans.question_id = ANY(string_to_array(a.question_draw, ',')::int[]))"
+
+class ExamReport(models.Model):
+    _name = 'easy_exams.report_exam'
+    _description = 'Exam Statistics'
+    _auto = False
+    _order = 'exam_id'
+
+    exam_id = fields.Many2one('easy_exams.exam', string="Exam", readonly=True)
+    course_id = fields.Many2one('easy_exams.course', string="Course", readonly=True)
+    attempt_count = fields.Integer(string="Attempts", readonly=True, aggregator='sum')
+    finished_count = fields.Integer(string="Finished Attempts", readonly=True, aggregator='sum')
+    avg_score = fields.Float(string="Average Score", readonly=True, aggregator='avg')
+    median_score = fields.Float(string="Median Score", readonly=True, aggregator='avg')
+    p25_score = fields.Float(string="25th Percentile", readonly=True, aggregator='avg')
+    p75_score = fields.Float(string="75th Percentile", readonly=True, aggregator='avg')
+    p90_score = fields.Float(string="90th Percentile", readonly=True, aggregator='avg')
+    max_score = fields.Float(string="Best Score", readonly=True, aggregator='max')
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        # Scores are only final once the attempt ended (as in _score_distribution), the
+        # attempts in progress only count in attempt_count.
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT
+                    e.id AS id,
+                    e.id AS exam_id,
+                    e.course_id AS course_id,
+                    COUNT(a.id) AS attempt_count,
+                    COUNT(a.end_time) AS finished_count,
+                    AVG(a.score) FILTER (WHERE a.end_time IS NOT NULL) AS avg_score,
+                    percentile_cont(0.5) WITHIN GROUP (ORDER BY a.score) FILTER (WHERE a.end_time IS NOT NULL) AS median_score,
+                    percentile_cont(0.25) WITHIN GROUP (ORDER BY a.score) FILTER (WHERE a.end_time IS NOT NULL) AS p25_score,
+                    percentile_cont(0.75) WITHIN GROUP (ORDER BY a.score) FILTER (WHERE a.end_time IS NOT NULL) AS p75_score,
+                    percentile_cont(0.9) WITHIN GROUP (ORDER BY a.score) FILTER (WHERE a.end_time IS NOT NULL) AS p90_score,
+                    MAX(a.score) FILTER (WHERE a.end_time IS NOT NULL) AS max_score
+                FROM easy_exams_exam e
+                LEFT JOIN easy_exams_exam_attempt a ON a.exam_id = e.id
+                GROUP BY e.id, e.course_id
+            )
+        """)
+
+
+class QuestionReport(models.Model):
+    _name = 'easy_exams.report_question'
+    _description = 'Question Statistics (Non-Archived Attempts)'
+    _auto = False
+    _order = 'question_id'
+
+    question_id = fields.Many2one('easy_exams.question', string="Question", readonly=True)
+    exam_id = fields.Many2one('easy_exams.exam', string="Exam", readonly=True)
+    question_type = fields.Selection([
+        ('multiple_choice', 'Multiple Choice'),
+        ('fill_in_the_blank', 'Fill in the Blank'),
+        ('short_answer', 'Short Answer'),
+        ('long_answer', 'Long Answer'),
+        ('matching', 'Matching')
+    ], string="Question Type", readonly=True)
+    answer_count = fields.Integer(string="Graded Answers", readonly=True, aggregator='sum')
+    correct_count = fields.Integer(string="Correct Answers", readonly=True, aggregator='sum')
+    correct_rate = fields.Float(string="Correctness Rate", readonly=True, aggregator='avg')
+    avg_score = fields.Float(string="Average Score", readonly=True, aggregator='avg')
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        # Ungraded answers (q_score 2) are left out of the rates, and so are the answers of the
+        # questions the attempt did not draw from the exam pools.
+        # The answers of the archived attempts only exist in easy_exams.attempt_archive, the
+        # view leaves them out (the item analysis API includes them).
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT
+                    q.id AS id,
+                    q.id AS question_id,
+                    q.exam_id AS exam_id,
+                    q.question_type AS question_type,
+                    COUNT(ans.id) AS answer_count,
+                    COUNT(ans.id) FILTER (WHERE ans.is_correct) AS correct_count,
+                    COUNT(ans.id) FILTER (WHERE ans.is_correct)::float / NULLIF(COUNT(ans.id), 0) AS correct_rate,
+                    AVG(ans.q_score) AS avg_score
+                FROM easy_exams_question q
+                LEFT JOIN (
+                    easy_exams_question_answer ans
+                    JOIN easy_exams_exam_attempt a ON a.id = ans.attempt_id
+                ) ON ans.question_id = q.id AND ans.q_score <> 2
+                     AND {DRAWN_FILTER}
+                GROUP BY q.id, q.exam_id, q.question_type
+            )
+        """)
+
+
+class OptionReport(models.Model):
+    _name = 'easy_exams.report_option'
+    _description = 'Option Statistics (Non-Archived Attempts)'
+    _auto = False
+    _order = 'option_id'
+
+    option_id = fields.Many2one('easy_exams.question_option', string="Option", readonly=True)
+    question_id = fields.Many2one('easy_exams.question', string="Question", readonly=True)
+    exam_id = fields.Many2one('easy_exams.exam', string="Exam", readonly=True)
+    is_correct = fields.Boolean(string="Is Correct", readonly=True)
+    selection_count = fields.Integer(string="Selections", readonly=True, aggregator='sum')
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        # Non-archived attempts only, as in easy_exams.report_question.
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT
+                    o.id AS id,
+                    o.id AS option_id,
+                    o.question_id AS question_id,
+                    q.exam_id AS exam_id,
+                    o.is_correct AS is_correct,
+                    COUNT(ao.id) AS selection_count
+                FROM easy_exams_question_option o
+                JOIN easy_exams_question q ON q.id = o.question_id
+                LEFT JOIN (
+                    easy_exams_answer_option ao
+                    JOIN easy_exams_question_answer ans ON ans.id = ao.answer_id
+                    JOIN easy_exams_exam_attempt a ON a.id = ans.attempt_id
+                ) ON ao.question_option = o.id AND {DRAWN_FILTER}
+                GROUP BY o.id, o.question_id, q.exam_id, o.is_correct
+            )
+        """)
@@ -0,0 +1,9 @@
+from odoo import models, fields
+
+
+class ResUsers(models.Model):
+    _inherit = 'res.users'
+
+    # Bumped when the courses the user manages change: part of the key of the cached
+    # memberships (easy_exams.course._get_managed_course_ids), as content_version for exams.
+    easy_course_version = fields.Integer(string="Course Membership Version", default=0, copy=False)
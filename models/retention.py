@@ -0,0 +1,148 @@
+from odoo import models, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class Retention(models.AbstractModel):
+    _name = 'easy_exams.retention'
+    _description = 'Exam Data Retention'
+
+    @api.model
+    def _delete_attempts(self, attempt_ids):
+        """
+        Delete the attempts and everything hanging from them, child tables first and always
+        by an indexed key, so no cascade has to scan a table.
+        """
+        if not attempt_ids:
+            return
+        attempt_ids = tuple(attempt_ids)
+        cr = self.env.cr
+        cr.execute("SELECT id FROM easy_exams_question_answer WHERE attempt_id IN %s", (attempt_ids,))
+        answer_ids = tuple(row[0] for row in cr.fetchall())
+        if answer_ids:
+            cr.execute("DELETE FROM easy_exams_answer_option WHERE answer_id IN %s", (answer_ids,))
+            cr.execute("DELETE FROM easy_exams_question_answer_pair WHERE answer_id IN %s", (answer_ids,))
+            cr.execute("DELETE FROM easy_exams_answer_lsh_bucket WHERE answer_id IN %s", (answer_ids,))
+            cr.execute("DELETE FROM easy_exams_answer_signature WHERE answer_id IN %s", (answer_ids,))
+            cr.execute("DELETE FROM easy_exams_question_answer WHERE id IN %s", (answer_ids,))
+        cr.execute("DELETE FROM easy_exams_answer_draft WHERE attempt_id IN %s", (attempt_ids,))
+        cr.execute("DELETE FROM easy_exams_attempt_event WHERE attempt_id IN %s", (attempt_ids,))
+        cr.execute("DELETE FROM easy_exams_attempt_archive WHERE attempt_id IN %s", (attempt_ids,))
+        cr.execute("DELETE FROM easy_exams_exam_attempt WHERE id IN %s", (attempt_ids,))
+        self.env.invalidate_all()
+
+    @api.model
+    def _purge_expired_attempts(self, batch_size):
+        """
+        Delete the finalized attempts that ended more than retention_days days ago in the
+        courses with a retention policy, one committed batch at a time.
+        :return: Number of attempts deleted
+        """
+        deleted = 0
+        while True:
+            self.env.cr.execute("""
+                SELECT a.id FROM easy_exams_exam_attempt a
+                JOIN easy_exams_exam e ON e.id = a.exam_id
+                JOIN easy_exams_course c ON c.id = e.course_id
+                WHERE c.retention_days > 0 AND a.is_finalized
+                  AND a.end_time < (now() at time zone 'UTC') - c.retention_days * interval '1 day'
+                ORDER BY a.id
+                LIMIT %s
+                FOR UPDATE OF a SKIP LOCKED
+            """, (batch_size,))
+            attempt_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not attempt_ids:
+                break
+            self._delete_attempts(attempt_ids)
+            self.env.cr.commit()
+            deleted += len(attempt_ids)
+            if len(attempt_ids) < batch_size:
+                break
+        return deleted
+
+    @api.model
+    def _purge_exam(self, exam_id, batch_size):
+        """
+        Delete a soft deleted exam: its attempts and questions in committed batches, then
+        the exam itself once nothing references it anymore.
+        :return: False when attempts locked by other transactions are left, the exam is then
+            kept for the next run rather than cascading into them in one transaction.
+        """
+        cr = self.env.cr
+        while True:
+            cr.execute("""
+                SELECT id FROM easy_exams_exam_attempt WHERE exam_id = %s
+                ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED
+            """, (exam_id, batch_size))
+            attempt_ids = [row[0] for row in cr.fetchall()]
+            if not attempt_ids:
+                break
+            self._delete_attempts(attempt_ids)
+            cr.commit()
+
+        cr.execute("SELECT 1 FROM easy_exams_exam_attempt WHERE exam_id = %s LIMIT 1", (exam_id,))
+        if cr.fetchone():
+            return False
+
+        cr.execute("DELETE FROM easy_exams_attempt_event WHERE exam_id = %s", (exam_id,))
+        cr.execute("DELETE FROM easy_exams_attempt_archive WHERE exam_id = %s", (exam_id,))
+        while True:
+            cr.execute("SELECT id FROM easy_exams_question WHERE exam_id = %s ORDER BY id LIMIT %s", (exam_id, batch_size))
+            question_ids = tuple(row[0] for row in cr.fetchall())
+            if not question_ids:
+                break
+            cr.execute("DELETE FROM easy_exams_answer_draft WHERE question_id IN %s", (question_ids,))
+            cr.execute("DELETE FROM easy_exams_question_option WHERE question_id IN %s", (question_ids,))
+            cr.execute("DELETE FROM easy_exams_question_pair WHERE question_id IN %s", (question_ids,))
+            # The images are attachments: unlinked through the ORM so their files are collected too.
+            self.env['ir.attachment'].sudo().search([
+                ('res_model', '=', 'easy_exams.question'),
+                ('res_id', 'in', list(question_ids)),
+                ('res_field', 'in', ['image', 'image_1024']),
+            ]).unlink()
+            cr.execute("DELETE FROM easy_exams_question WHERE id IN %s", (question_ids,))
+            cr.commit()
+        cr.execute("DELETE FROM easy_exams_exam_pool WHERE exam_id = %s", (exam_id,))
+        cr.execute("DELETE FROM easy_exams_exam WHERE id = %s", (exam_id,))
+        self.env.invalidate_all()
+        cr.commit()
+        return True
+
+    @api.model
+    def _purge_deleted(self, batch_size):
+        """
+        Finish the deletes requested through the API: the soft deleted exams, then the soft
+        deleted courses left without exams.
+        :return: (number of exams deleted, number of courses deleted)
+        """
+        cr = self.env.cr
+        cr.execute("SELECT id FROM easy_exams_exam WHERE active IS NOT TRUE AND deleted_at IS NOT NULL ORDER BY id")
+        exam_count = 0
+        for exam_id in [row[0] for row in cr.fetchall()]:
+            if self._purge_exam(exam_id, batch_size):
+                exam_count += 1
+
+        cr.execute("""
+            DELETE FROM easy_exams_course c
+            WHERE c.active IS NOT TRUE AND c.deleted_at IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM easy_exams_exam e WHERE e.course_id = c.id)
+            RETURNING id
+        """)
+        course_count = len(cr.fetchall())
+        # No cache to clear: the courses left the cached memberships when they were deactivated.
+        if course_count:
+            self.env.invalidate_all()
+        cr.commit()
+        return exam_count, course_count
+
+    @api.model
+    def _cron_purge(self, batch_size=500):
+        """
+        Delete the soft deleted exams and courses and the attempts older than the retention
+        policy of their course, in bounded batches committed one by one.
+        """
+        exam_count, course_count = self._purge_deleted(batch_size)
+        attempt_count = self._purge_expired_attempts(batch_size)
+        _logger.info("Purged %s deleted exams, %s deleted courses and %s expired attempts",
+                     exam_count, course_count, attempt_count)
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+from . import test_attempts
+from . import test_attempt_archive
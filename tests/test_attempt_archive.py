@@ -0,0 +1,56 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestAttemptArchive(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        course = cls.env['easy_exams.course'].create({'name': 'Course', 'code': 'TSTARC', 'access_key': 'key'})
+        cls.exam = cls.env['easy_exams.exam'].create({
+            'name': 'Exam', 'course_id': course.id, 'access_code': 'TSTARC', 'duration': 30,
+        })
+        cls.choice, cls.matching, cls.short = cls.env['easy_exams.question'].create([
+            {'exam_id': cls.exam.id, 'question_type': 'multiple_choice', 'content': 'Pick the right ones'},
+            {'exam_id': cls.exam.id, 'question_type': 'matching', 'content': 'Match the capitals'},
+            {'exam_id': cls.exam.id, 'question_type': 'short_answer', 'content': 'Name a prime number'},
+        ])
+        cls.right, cls.wrong = cls.env['easy_exams.question_option'].create([
+            {'question_id': cls.choice.id, 'content': 'Right', 'is_correct': True},
+            {'question_id': cls.choice.id, 'content': 'Wrong', 'is_correct': False},
+        ])
+        cls.france, cls.spain = cls.env['easy_exams.question_pair'].create([
+            {'question_id': cls.matching.id, 'term': 'France', 'match': 'Paris'},
+            {'question_id': cls.matching.id, 'term': 'Spain', 'match': 'Madrid'},
+        ])
+
+    def test_archive_keeps_the_answer_rows(self):
+        """_get_answer_rows returns the same rows before and after the attempt is archived"""
+        attempt = self.env['easy_exams.exam_attempt'].create({
+            'exam_id': self.exam.id, 'student_name': 'Student', 'student_id': 'S1',
+        })
+        answers = self.env['easy_exams.question_answer'].with_context(skip_grading=True)
+        choice_answer, matching_answer, short_answer = answers.create([
+            {'attempt_id': attempt.id, 'question_id': self.choice.id, 'answer_text': '', 'is_correct': True, 'q_score': 1},
+            {'attempt_id': attempt.id, 'question_id': self.matching.id, 'answer_text': 'Pairs', 'q_score': 0.5},
+            {'attempt_id': attempt.id, 'question_id': self.short.id, 'answer_text': False},
+        ])
+        self.env['easy_exams.answer_option'].with_context(skip_grading=True).create([
+            {'answer_id': choice_answer.id, 'question_option': self.right.id},
+            {'answer_id': choice_answer.id, 'question_option': self.wrong.id},
+        ])
+        self.env['easy_exams.question_answer_pair'].with_context(skip_grading=True).create([
+            {'answer_id': matching_answer.id, 'question_pair_id': self.france.id, 'selected_match': 'Paris'},
+            {'answer_id': matching_answer.id, 'question_pair_id': self.spain.id, 'selected_match': 'Paris'},
+        ])
+        before = attempt._get_answer_rows()
+        self.assertEqual(len(before[attempt.id]), 3)
+        self.assertEqual(len(before[attempt.id][0]['selected_options']), 2)
+        self.assertEqual(len(before[attempt.id][1]['answer_pairs']), 2)
+
+        self.env['easy_exams.attempt_archive']._archive_attempts(attempt.ids)
+
+        self.assertTrue(attempt.is_archived)
+        self.assertFalse(attempt.answer_ids)
+        self.assertEqual(attempt._get_answer_rows(), before)
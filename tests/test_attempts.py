@@ -0,0 +1,41 @@
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestAttemptFinalize(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        course = cls.env['easy_exams.course'].create({'name': 'Course', 'code': 'TSTFIN', 'access_key': 'key'})
+        cls.exam = cls.env['easy_exams.exam'].create({
+            'name': 'Exam', 'course_id': course.id, 'access_code': 'TSTFIN', 'duration': 30,
+        })
+        cls.question = cls.env['easy_exams.question'].create({
+            'exam_id': cls.exam.id, 'question_type': 'multiple_choice', 'content': 'Pick the right one',
+        })
+        cls.right, cls.wrong = cls.env['easy_exams.question_option'].create([
+            {'question_id': cls.question.id, 'content': 'Right', 'is_correct': True},
+            {'question_id': cls.question.id, 'content': 'Wrong', 'is_correct': False},
+        ])
+
+    def test_finalize_stores_the_regraded_score(self):
+        """The score is summed after the pending regrade, not from the stale ungraded rows"""
+        attempt = self.env['easy_exams.exam_attempt'].create({
+            'exam_id': self.exam.id, 'student_name': 'Student', 'student_id': 'S1',
+        })
+        answers = self.env['easy_exams.question_answer'].with_context(skip_grading=True)
+        answer = answers.create({'attempt_id': attempt.id, 'question_id': self.question.id, 'answer_text': ''})
+        self.env['easy_exams.answer_option'].with_context(skip_grading=True).create({
+            'answer_id': answer.id, 'question_option': self.right.id,
+        })
+        self.assertEqual(answer.q_score, 2)
+
+        attempt._finalize()
+
+        self.assertTrue(attempt.is_finalized)
+        self.assertEqual(answer.q_score, 1)
+        self.assertEqual(attempt.score, 1)
+        attempt.invalidate_recordset(['score'])
+        self.env.cr.execute("SELECT score FROM easy_exams_exam_attempt WHERE id = %s", (attempt.id,))
+        self.assertEqual(self.env.cr.fetchone()[0], 1)
@@ -0,0 +1,14 @@
+from .cache import LRUCache
+
+SECRET_KEY_PARAM = 'easy_apps_secret_key'
+
+# Signing key per database. The TTL bounds how long another worker keeps a rotated key.
+secret_cache = LRUCache(max_size=64, ttl=300)
+# Verified token -> claims, keyed by (signing key, token) so a key rotation orphans old entries.
+token_cache = LRUCache(max_size=4096)
+
+
+def invalidate_secret_key(dbname):
+    """Forget the cached signing key and the tokens verified with it"""
+    secret_cache.pop(dbname)
+    token_cache.clear()
@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU cache shared by the worker threads of one process.
+    Entries can expire after a time-to-live (in seconds) or at an explicit timestamp.
+    With a weigher (value -> size, e.g. in bytes), the least recently used entries are also
+    dropped while the total size exceeds max_weight, and larger values are never stored.
+    """
+
+    def __init__(self, max_size=1024, ttl=None, max_weight=None, weigher=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self._weight = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default when it is missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at, weight = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                self._weight -= weight
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at=None):
+        """
+        Store value under key.
+        :param expires_at: Unix timestamp after which the entry is dropped, defaults to now + ttl.
+        """
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.time() + self.ttl
+        weight = self.weigher(value) if self.weigher else 0
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous:
+                self._weight -= previous[2]
+            if self.max_weight is not None and weight > self.max_weight:
+                return
+            self._data[key] = (value, expires_at, weight)
+            self._weight += weight
+            while len(self._data) > self.max_size or (self.max_weight is not None and self._weight > self.max_weight):
+                self._weight -= self._data.popitem(last=False)[1][2]
+
+    def pop(self, key, default=None):
+        """Remove key from the cache and return its value."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry:
+                self._weight -= entry[2]
+        return entry[0] if entry else default
+
+    def clear(self, predicate=None):
+        """Remove every entry, or only the ones whose key matches predicate."""
+        with self._lock:
+            if predicate is None:
+                self._data.clear()
+                self._weight = 0
+                return
+            for key in [key for key in self._data if predicate(key)]:
+                self._weight -= self._data.pop(key)[2]
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,71 @@
+import logging
+import selectors
+import threading
+
+from odoo.sql_db import db_connect
+
+_logger = logging.getLogger(__name__)
+
+# Postgres channel notified by easy_exams.attempt_event._log when its transaction commits,
+# the payload is the exam id. Notifications stay within a database: one listener per database.
+CHANNEL = 'easy_exams_attempt_event'
+SELECT_TIMEOUT = 50
+
+
+class EventListener:
+    """
+    One LISTEN connection per database and process for the new attempt events. The live
+    feeds wait on it instead of reading the event log every second with their own cursor.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._versions = {}
+        self._threads = {}
+
+    def _ensure_started(self, dbname):
+        thread = self._threads.get(dbname)
+        if thread is None or not thread.is_alive():
+            thread = threading.Thread(target=self._run, args=(dbname,), name=f'easy_exams_event_listener_{dbname}', daemon=True)
+            self._threads[dbname] = thread
+            thread.start()
+
+    def version(self, dbname, exam_id):
+        """Counter of the notifications of the exam, read it before reading the event log"""
+        with self._condition:
+            self._ensure_started(dbname)
+            return self._versions.get((dbname, exam_id), 0)
+
+    def wait(self, dbname, exam_id, version, timeout):
+        """Wait until the exam is notified after version was read, or timeout seconds"""
+        key = (dbname, exam_id)
+        with self._condition:
+            return self._condition.wait_for(lambda: self._versions.get(key, 0) != version, timeout)
+
+    def _notify(self, dbname, payload):
+        if not payload.isdigit():
+            return
+        key = (dbname, int(payload))
+        with self._condition:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._condition.notify_all()
+
+    def _run(self, dbname):
+        try:
+            with db_connect(dbname).cursor() as cr, selectors.DefaultSelector() as selector:
+                cr.execute(f"LISTEN {CHANNEL}")
+                cr.commit()
+                connection = cr._cnx
+                selector.register(connection, selectors.EVENT_READ)
+                while True:
+                    if selector.select(SELECT_TIMEOUT):
+                        connection.poll()
+                        while connection.notifies:
+                            self._notify(dbname, connection.notifies.pop(0).payload)
+        except Exception:
+            # The feeds fall back to reading the log on their keep-alive timeout, the next
+            # feed restarts the listener.
+            _logger.exception("Attempt event listener of %s stopped", dbname)
+
+
+listener = EventListener()
@@ -0,0 +1,135 @@
+import bisect
+import functools
+import os
+import threading
+import time
+
+# Upper bounds of the histogram buckets, +Inf is implicit.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 60)
+
+
+
+def _format_labels(labels):
+    return ','.join(f'{name}="{value}"'.replace('\n', ' ') for name, value in labels)
+
+
+class Histogram:
+    """Cumulative histogram per label set, in the Prometheus model"""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, labels, value):
+        # The lock is taken by Metrics.
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{_format_labels(labels + (("le", bound),))}}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{_format_labels(labels)}}} {total}')
+            lines.append(f'{self.name}_count{{{_format_labels(labels)}}} {cumulative}')
+        return lines
+
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._series = {}
+
+    def inc(self, labels, value=1):
+        self._series[labels] = self._series.get(labels, 0) + value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        lines.extend(f'{self.name}{{{_format_labels(labels)}}} {value}' for labels, value in sorted(self._series.items()))
+        return lines
+
+
+class Metrics:
+    """
+    Per route metrics of the easy_exams controllers, aggregated in memory by the process.
+    Recording is a dict lookup and a few additions under a lock, cheap enough for every request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter('easy_exams_requests_total', "Requests per route and status code.")
+        self.duration = Histogram('easy_exams_request_duration_seconds', "Wall time of the requests.", DURATION_BUCKETS)
+        self.queries = Histogram('easy_exams_request_sql_queries', "SQL queries per request.", QUERY_BUCKETS)
+        self.sql_duration = Histogram('easy_exams_request_sql_duration_seconds', "SQL time per request.", DURATION_BUCKETS)
+        self.response_bytes = Histogram('easy_exams_response_bytes', "Size of the response bodies.", BYTES_BUCKETS)
+        self.llm_calls = Counter('easy_exams_request_llm_calls_total', "Grading LLM calls made by the requests.")
+        self.llm_request_duration = Counter('easy_exams_request_llm_duration_seconds_total', "Time the requests spent waiting for the grading LLM.")
+        self.llm_duration = Histogram('easy_exams_llm_call_duration_seconds', "Latency of the grading LLM calls.", LLM_BUCKETS)
+
+    def observe_request(self, route, method, status, duration, queries, sql_duration, response_bytes, llm_calls, llm_duration):
+        # Every worker process keeps its own metrics, the label tells the series of the workers
+        # apart (read per call: the module can be imported before the workers are forked).
+        labels = (('process', os.getpid()), ('route', route), ('method', method))
+        with self._lock:
+            self.requests.inc(labels + (('status', str(status)),))
+            self.duration.observe(labels, duration)
+            self.queries.observe(labels, queries)
+            self.sql_duration.observe(labels, sql_duration)
+            if response_bytes is not None:
+                self.response_bytes.observe(labels, response_bytes)
+            if llm_calls:
+                self.llm_calls.inc(labels, llm_calls)
+                self.llm_request_duration.inc(labels, llm_duration)
+
+    def observe_llm_call(self, duration, ok):
+        labels = (('process', os.getpid()), ('outcome', 'success' if ok else 'error'))
+        with self._lock:
+            self.llm_duration.observe(labels, duration)
+
+    def render(self):
+        """Prometheus text exposition format"""
+        with self._lock:
+            lines = []
+            for metric in (self.requests, self.duration, self.queries, self.sql_duration, self.response_bytes,
+                           self.llm_calls, self.llm_request_duration, self.llm_duration):
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def track_llm_call(duration, ok):
+    """
+    Record a grading LLM call: in the process wide latency histogram and, when it happens
+    while serving a request, in the LLM counters of the current request.
+    """
+    metrics.observe_llm_call(duration, ok)
+    thread = threading.current_thread()
+    if getattr(thread, 'easy_exams_request', None) is not None:
+        thread.easy_exams_request['llm_calls'] += 1
+        thread.easy_exams_request['llm_duration'] += duration
+
+
+def timed_llm_call(func):
+    """Decorator recording the latency of a grading LLM call, the grading failure value '2' counts as an error"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        track_llm_call(time.perf_counter() - start, result != '2')
+        return result
+    return wrapper
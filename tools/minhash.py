@@ -0,0 +1,98 @@
+"""
+MinHash signatures and LSH banding of free text answers.
+
+Plain Python and NumPy only (no Odoo import), so the benchmark can load it on its own.
+"""
+import hashlib
+import re
+
+import numpy as np
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# Estimated Jaccard similarity from which two answers are reported as near duplicates.
+DEFAULT_THRESHOLD = 0.5
+
+# Universal hashing (a * x + b) mod p on 32 bits hashes, with p the first prime above 2**32.
+# a, x < 2**32 and b < 2**32 so the products never overflow uint64.
+_PRIME = np.uint64((1 << 32) + 15)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_random = np.random.RandomState(1)
+_A = _random.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_B = _random.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def _hash32(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=4).digest(), 'little')
+
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """32 bits hashes of the distinct word size-grams of text (lowercased, punctuation ignored)"""
+    words = _WORD.findall((text or '').lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    if len(words) <= size:
+        grams = {' '.join(words)}
+    else:
+        grams = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((_hash32(gram) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def signature(text):
+    """MinHash signature of text (NUM_PERM uint32), None when it has no words"""
+    hashes = shingle_hashes(text)
+    if not hashes.size:
+        return None
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME
+    return (permuted.min(axis=1) & _MAX_HASH).astype(np.uint32)
+
+
+def band_buckets(sig):
+    """
+    One bucket key per band, as a signed 32 bits integer (a PostgreSQL integer).
+    A rare collision only adds a candidate pair, discarded when the signatures are compared.
+    """
+    data = sig.astype('<u4').tobytes()
+    width = ROWS * 4
+    return [
+        int.from_bytes(hashlib.blake2b(data[band * width:(band + 1) * width], digest_size=4).digest(), 'little', signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the shingle sets of two signatures"""
+    return float(np.count_nonzero(sig_a == sig_b)) / NUM_PERM
+
+
+def to_bytes(sig):
+    return sig.astype('<u4').tobytes()
+
+
+def from_bytes(data):
+    return np.frombuffer(bytes(data), dtype='<u4')
+
+
+def candidate_pairs(buckets):
+    """
+    Pairs of keys sharing at least one band bucket.
+    :param buckets: iterable of (key, band buckets as returned by band_buckets)
+    :return: set of (key, key) with the smaller key first
+    """
+    index = {}
+    for key, keys_buckets in buckets:
+        for band, bucket in enumerate(keys_buckets):
+            index.setdefault((band, bucket), []).append(key)
+    pairs = set()
+    for keys in index.values():
+        if len(keys) < 2:
+            continue
+        keys = sorted(keys)
+        for i, first in enumerate(keys):
+            for second in keys[i + 1:]:
+                pairs.add((first, second))
+    return pairs
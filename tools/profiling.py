@@ -0,0 +1,100 @@
+import collections
+import re
+import sys
+import threading
+
+# Parameters whose value is never logged.
+SECRET_PARAMS = re.compile(r'pass|token|secret|key|code|authorization|jwt', re.IGNORECASE)
+MAX_VALUE_LENGTH = 200
+MAX_STATEMENTS = 200
+MAX_STATEMENT_LENGTH = 1000
+
+
+def redact(value, name=''):
+    """Copy of request parameters safe to log: secret values masked, long strings (images) truncated"""
+    if name and SECRET_PARAMS.search(name):
+        return '***'
+    if isinstance(value, dict):
+        return {key: redact(item, str(key)) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    if isinstance(value, str) and len(value) > MAX_VALUE_LENGTH:
+        return f'{value[:MAX_VALUE_LENGTH]}... ({len(value)} chars)'
+    return value
+
+
+class SqlRecorder:
+    """
+    Query hook of the Odoo cursors (thread query_hooks) keeping the statements of a request
+    and their durations. The parameters are not kept, they may hold secrets.
+    """
+
+    def __init__(self):
+        self.statements = []
+        self.dropped = 0
+
+    def __call__(self, cursor, query, params, start, delay):
+        if len(self.statements) < MAX_STATEMENTS:
+            if isinstance(query, bytes):
+                query = query.decode('utf-8', 'replace')
+            self.statements.append((str(query)[:MAX_STATEMENT_LENGTH], delay))
+        else:
+            self.dropped += 1
+
+    def attach(self, thread):
+        hooks = getattr(thread, 'query_hooks', None)
+        if hooks is None:
+            hooks = thread.query_hooks = []
+        hooks.append(self)
+
+    def detach(self, thread):
+        hooks = getattr(thread, 'query_hooks', None)
+        if hooks and self in hooks:
+            hooks.remove(self)
+
+    def summary(self):
+        return {
+            'count': len(self.statements) + self.dropped,
+            'statements': [{'query': query, 'ms': round(delay * 1000, 3)} for query, delay in self.statements],
+            'not_recorded': self.dropped,
+        }
+
+
+class StackSampler:
+    """
+    Statistical profile of one thread: a daemon thread reads its current stack every
+    interval seconds and counts the collapsed stacks (outermost call first).
+    """
+
+    def __init__(self, thread, interval=0.005):
+        self.thread_id = thread.ident
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name='easy_exams_stack_sampler', daemon=True)
+
+    def start(self):
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_filename.rsplit("/", 2)[-1]}:{frame.f_lineno}:{code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def summary(self, top=20):
+        total = sum(self.samples.values())
+        return {
+            'interval_ms': self.interval * 1000,
+            'samples': total,
+            'stacks': [{'stack': stack, 'samples': count} for stack, count in self.samples.most_common(top)],
+        }